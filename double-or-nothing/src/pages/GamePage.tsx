@@ -1,7 +1,8 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import Question from "../components/Question";
 
 const API_BASE_URL = 'http://localhost:8000';
+const WS_BASE_URL = API_BASE_URL.replace(/^http/, 'ws');
 
 interface AnswerData {
     id: string;
@@ -19,15 +20,29 @@ interface QuestionData {
     game_over_message: string | null;
 }
 
+interface GameEventData {
+    type: string;
+    message: string;
+}
+
+// Messages pushed by the server over the game channel
+type ChannelMessage =
+    | ({ type: 'question' | 'game_over' } & QuestionData)
+    | { type: 'events'; events: GameEventData[] }
+    | { type: 'error'; detail: string };
+
 export default function GamePage() {
     const [gameId, setGameId] = useState<string | null>(null);
     const [questionData, setQuestionData] = useState<QuestionData | null>(null);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState<string | null>(null);
+    const [events, setEvents] = useState<GameEventData[]>([]);
+    const socketRef = useRef<WebSocket | null>(null);
 
     // Initialize game on mount
     useEffect(() => {
         initializeGame();
+        return () => closeChannel();
     }, []);
 
     const initializeGame = async () => {
@@ -47,68 +62,78 @@ export default function GamePage() {
             const data = await response.json();
             setGameId(data.game_id);
 
-            // Get first question
-            await fetchQuestion(data.game_id);
+            // The server pushes the first question as soon as the channel opens
+            openChannel(data.game_id);
         } catch (err) {
             setError(err instanceof Error ? err.message : 'Failed to initialize game');
             console.error('Failed to initialize game:', err);
-        } finally {
             setLoading(false);
         }
     };
 
-    const fetchQuestion = async (id: string) => {
-        try {
-            const response = await fetch(`${API_BASE_URL}/api/game/${id}/question`);
-            
-            if (!response.ok) {
-                throw new Error('Failed to fetch question');
+    // Closing on purpose detaches the socket first, so its onclose doesn't report an error
+    const closeChannel = () => {
+        const socket = socketRef.current;
+        socketRef.current = null;
+        socket?.close();
+    };
+
+    const openChannel = (id: string) => {
+        closeChannel();
+        const socket = new WebSocket(`${WS_BASE_URL}/api/game/${id}/ws`);
+        socketRef.current = socket;
+        let finished = false;
+
+        socket.onmessage = (event) => {
+            const message: ChannelMessage = JSON.parse(event.data);
+
+            if (message.type === 'events') {
+                setEvents(message.events);
+                return;
             }
-            
-            const data: QuestionData = await response.json();
-            setQuestionData(data);
-        } catch (err) {
-            setError(err instanceof Error ? err.message : 'Failed to fetch question');
-            console.error('Failed to fetch question:', err);
-        }
+
+            setLoading(false);
+            if (message.type === 'game_over') {
+                finished = true;
+            }
+            if (message.type === 'error') {
+                setError(message.detail);
+                console.error('Game channel error:', message.detail);
+            } else {
+                setQuestionData(message);
+            }
+        };
+
+        socket.onerror = () => {
+            setError('Lost connection to the game server');
+            setLoading(false);
+        };
+
+        // The server closes the channel after game over; any other close (restart, 4404 "Game not found") is an error
+        socket.onclose = (event) => {
+            if (finished || socketRef.current !== socket) return;
+            socketRef.current = null;
+            setError(event.reason || 'Lost connection to the game server');
+            setLoading(false);
+        };
     };
 
-    const handleAnswerClick = async (answerId: string) => {
-        if (!gameId || loading) return;
+    const handleAnswerClick = (answerId: string) => {
+        const socket = socketRef.current;
+        if (!gameId || loading || !socket || socket.readyState !== WebSocket.OPEN) return;
         
         setLoading(true);
         setError(null);
-        
-        try {
-            const response = await fetch(`${API_BASE_URL}/api/game/choice`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    game_id: gameId,
-                    choice_id: answerId,
-                }),
-            });
-            
-            if (!response.ok) {
-                throw new Error('Failed to submit choice');
-            }
-            
-            const data: QuestionData = await response.json();
-            setQuestionData(data);
-        } catch (err) {
-            setError(err instanceof Error ? err.message : 'Failed to submit choice');
-            console.error('Failed to submit choice:', err);
-        } finally {
-            setLoading(false);
-        }
+        setEvents([]);
+        socket.send(answerId);
     };
 
     const handleRestart = () => {
+        closeChannel();
         setGameId(null);
         setQuestionData(null);
         setError(null);
+        setEvents([]);
         initializeGame();
     };
 
@@ -218,6 +243,19 @@ export default function GamePage() {
                 </div>
             </div>
 
+            {events.length > 0 && (
+                <div className="m-auto mt-6 max-w-2xl px-4">
+                    {events.map((event) => (
+                        <div
+                            key={event.type}
+                            className="mb-2 px-4 py-2 rounded-xl bg-white/25 backdrop-blur-xl border border-white/40 text-sm text-black/70"
+                        >
+                            {event.message}
+                        </div>
+                    ))}
+                </div>
+            )}
+
             <Question
                 questionText={questionData.question}
                 answers={questionData.answers}
@@ -1,16 +1,157 @@
 # api_server.py
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
+from typing import Optional, Dict, List, Tuple
+import asyncio
+import contextvars
+import json
 import os
 import uuid
 
-# Import the college simulator
-from infcollege import CollegeSimulator
+# Import the college simulator (the Gemini SDK itself is loaded lazily in create_model)
+from infcollege import CollegeSimulator, GameEvent, create_model, get_api_key
+from prompt_builder import PromptBudgetError
+from outcome_export import OutcomeExporter
+from game_stats import GameStats, compact_snapshots, merged_stats, write_snapshot
+from outcome_odds import OddsTable
+from question_corpus import SharedCorpus, append_record, stat_bucket
+import profiling
 
-app = FastAPI()
+
+class LLMState:
+    """Shared Gemini client, warmed in the background after startup"""
+    def __init__(self):
+        self.model = None
+        self.error: Optional[str] = None
+        self.warmup: Optional[asyncio.Task] = None
+        self.attempted = asyncio.Event()  # Set once the first warmup attempt has finished
+
+llm = LLMState()
+
+# Parquet export of finished games, enabled by setting OUTCOME_EXPORT_DIR
+exporter: Optional[OutcomeExporter] = None
+if os.environ.get('OUTCOME_EXPORT_DIR'):
+    exporter = OutcomeExporter(
+        os.environ['OUTCOME_EXPORT_DIR'],
+        batch_rows=int(os.environ.get('OUTCOME_EXPORT_BATCH_ROWS', 1000)),
+        flush_interval=float(os.environ.get('OUTCOME_EXPORT_FLUSH_SECONDS', 10)),
+        max_file_bytes=int(os.environ.get('OUTCOME_EXPORT_MAX_FILE_MB', 64)) * 1024 * 1024,
+        max_file_age=float(os.environ.get('OUTCOME_EXPORT_MAX_FILE_SECONDS', 3600)),
+    )
+
+# Aggregates over finished games; with STATS_SNAPSHOT_DIR set, workers share snapshots there
+game_stats = GameStats()
+STATS_SNAPSHOT_DIR = os.environ.get('STATS_SNAPSHOT_DIR')
+STATS_SNAPSHOT_SECONDS = float(os.environ.get('STATS_SNAPSHOT_SECONDS', 15))
+# Snapshots not rewritten for this long belong to stopped workers and are folded into one retired file
+STATS_SNAPSHOT_STALE_SECONDS = float(os.environ.get('STATS_SNAPSHOT_STALE_SECONDS', max(300, 10 * STATS_SNAPSHOT_SECONDS)))
+
+# Precomputed chance-to-graduate table (built by outcome_odds.py --out), loaded at startup
+ODDS_TABLE = os.environ.get('ODDS_TABLE')
+odds_table: Optional[OddsTable] = None
+
+
+async def load_odds_table():
+    global odds_table
+    try:
+        odds_table = await asyncio.to_thread(OddsTable.load, ODDS_TABLE)
+    except Exception as e:
+        print(f"Failed to load odds table {ODDS_TABLE}: {e}")
+
+# Opt-in request profiling: send "X-Profile: 1" (when PROFILE_DIR is set) or sample PROFILE_SAMPLE_RATE of requests.
+# Game channels profile each turn instead: connect with ?profile=1 or get sampled at the same rate.
+PROFILE_DIR = os.environ.get('PROFILE_DIR')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000
+profile_ring = profiling.ProfileRing(PROFILE_DIR, int(os.environ.get('PROFILE_MAX_FILES', 100))) if PROFILE_DIR else None
+
+# Batch API limits: games per call, and concurrent question generations per batch call
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 100))
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', 16))
+
+# Seconds to wait for the LLM before serving a local template question instead
+LLM_DEADLINE_SECONDS = float(os.environ.get('LLM_DEADLINE_SECONDS', 8))
+
+# LLM calls run in their own bounded pool, so calls stuck in an outage can't starve
+# the default executor that file writes and stats merging use
+LLM_THREADS = int(os.environ.get('LLM_THREADS', 32))
+llm_executor = ThreadPoolExecutor(max_workers=LLM_THREADS, thread_name_prefix="llm")
+
+# Seconds between warmup retries while the SDK can't be initialized (doubling up to 5 minutes)
+LLM_RETRY_SECONDS = float(os.environ.get('LLM_RETRY_SECONDS', 10))
+
+# Memory-mapped question corpus (built by question_corpus.py) tried before templates on fallback.
+# Rebuilds swapped in at the same path are picked up within QUESTION_CORPUS_CHECK_SECONDS.
+QUESTION_CORPUS = os.environ.get('QUESTION_CORPUS')
+question_corpus = SharedCorpus(QUESTION_CORPUS, float(os.environ.get('QUESTION_CORPUS_CHECK_SECONDS', 5))) if QUESTION_CORPUS else None
+
+# JSONL log of LLM-generated questions, the input for rebuilding the corpus
+QUESTION_LOG = os.environ.get('QUESTION_LOG')
+
+
+async def publish_stats():
+    """Periodically write this worker's stats snapshot for the others to merge, and retire stopped workers' ones"""
+    while True:
+        await asyncio.to_thread(compact_snapshots, STATS_SNAPSHOT_DIR, STATS_SNAPSHOT_STALE_SECONDS)
+        await asyncio.sleep(STATS_SNAPSHOT_SECONDS)
+        await asyncio.to_thread(write_snapshot, game_stats, STATS_SNAPSHOT_DIR)
+
+
+async def warm_llm():
+    """Import the SDK and build the shared model client off the event loop, retrying until it works"""
+    api_key = get_api_key()
+    if not api_key:
+        llm.error = "GEMINI_KEY not configured"
+        llm.attempted.set()
+        return
+    
+    delay = LLM_RETRY_SECONDS
+    while llm.model is None:
+        try:
+            llm.model = await asyncio.to_thread(create_model, api_key)
+            llm.error = None
+        except Exception as e:
+            llm.error = f"Failed to initialize Gemini: {str(e)}"
+            print(f"{llm.error}; retrying in {delay:.0f}s (questions use the local fallback meanwhile)")
+        llm.attempted.set()
+        
+        if llm.model is None:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 300)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Don't wait for the SDK: the server accepts connections while it warms
+    llm.warmup = asyncio.create_task(warm_llm())
+    if exporter:
+        exporter.start()
+    stats_publisher = asyncio.create_task(publish_stats()) if STATS_SNAPSHOT_DIR else None
+    odds_loader = asyncio.create_task(load_odds_table()) if ODDS_TABLE else None
+    yield
+    if odds_loader:
+        odds_loader.cancel()
+    llm.warmup.cancel()
+    llm_executor.shutdown(wait=False, cancel_futures=True)
+    if exporter:
+        await asyncio.to_thread(exporter.stop)
+    if stats_publisher:
+        stats_publisher.cancel()
+        await asyncio.to_thread(write_snapshot, game_stats, STATS_SNAPSHOT_DIR)
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+if profile_ring:
+    app.add_middleware(
+        profiling.ProfileMiddleware, ring=profile_ring, interval=PROFILE_INTERVAL, sample_rate=PROFILE_SAMPLE_RATE
+    )
 
 # Configure CORS for React frontend
 app.add_middleware(
@@ -29,6 +170,14 @@ app.add_middleware(
 # Store active game sessions
 games: Dict[str, CollegeSimulator] = {}
 
+# One lock per game, held from applying a choice until the next question is stored,
+# so concurrent submissions for a game (HTTP, WebSocket or batch) take turns
+game_locks: Dict[str, asyncio.Lock] = {}
+
+
+def game_lock(game_id: str) -> asyncio.Lock:
+    return game_locks.setdefault(game_id, asyncio.Lock())
+
 # Pydantic models for request/response
 class GameCreateResponse(BaseModel):
     game_id: str
@@ -52,39 +201,83 @@ class ChoiceRequest(BaseModel):
     game_id: str
     choice_id: str
 
+class BatchCreateRequest(BaseModel):
+    count: int
 
-@app.post("/api/game/new", response_model=GameCreateResponse)
-async def create_game():
-    """Create a new game session"""
-    api_key = os.environ.get('GEMINI_KEY')
+class BatchGame(BaseModel):
+    game_id: str
+    question: QuestionResponse
+
+class BatchCreateResponse(BaseModel):
+    games: List[BatchGame]
+
+class BatchChoiceRequest(BaseModel):
+    choices: List[ChoiceRequest]
+
+
+async def require_model():
+    """Return the shared model client, waiting for the first warmup attempt if it is still running"""
+    if llm.model is None and llm.warmup is not None:
+        await llm.attempted.wait()
     
-    if not api_key:
-        raise HTTPException(status_code=500, detail="GEMINI_KEY not configured")
+    if llm.model is None:
+        raise HTTPException(status_code=503, detail=f"LLM not ready: {llm.error or 'warming up'}")
     
-    game_id = str(uuid.uuid4())
-    games[game_id] = CollegeSimulator(api_key)
+    return llm.model
+
+
+async def llm_question(simulator: CollegeSimulator) -> Dict:
+    """Ask the LLM for the next question without changing the game state"""
+    if simulator.model is None:
+        simulator.model = await require_model()
     
-    return GameCreateResponse(
-        game_id=game_id,
-        message="Game created successfully"
+    prompt = simulator.build_prompt()
+    game_stats.record_prompt(simulator.prompt_builder.last_tokens, simulator.prompt_builder.last_trimmed)
+    
+    # Run off the event loop so other games and channels keep being served. The SDK timeout
+    # frees the thread soon after the deadline; the context carries the request's profile.
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        llm_executor, context.run, simulator.request_question, prompt, LLM_DEADLINE_SECONDS
     )
 
 
-@app.get("/api/game/{game_id}/question", response_model=QuestionResponse)
-async def get_question(game_id: str):
-    """Get the current/next question for a game"""
-    if game_id not in games:
-        raise HTTPException(status_code=404, detail="Game not found")
-    
-    simulator = games[game_id]
+async def next_question(simulator: CollegeSimulator) -> Dict:
+    """Generate the next question, falling back to local templates if the LLM misses its deadline"""
+    # The major selection question is built locally and doesn't need the LLM
+    if simulator.question_count == 0:
+        return simulator.generate_question()
     
     try:
-        question_data = simulator.generate_question()
-        
-        # Store the question for later use when submitting choice
-        simulator.current_question = question_data
-        
-        # Remove effects from answers - only send id and text
+        question_data = await asyncio.wait_for(llm_question(simulator), LLM_DEADLINE_SECONDS)
+        source = 'llm'
+    except asyncio.TimeoutError:
+        print(f"LLM missed the {LLM_DEADLINE_SECONDS:.1f}s deadline, using a template question")
+        source = 'fallback_timeout'
+    except PromptBudgetError as e:
+        print(f"{e}, using a template question")
+        source = 'fallback_budget'
+    except Exception as e:
+        print(f"LLM failed ({e}), using a template question")
+        source = 'fallback_error'
+    
+    game_stats.record_question_source(source)
+    if source != 'llm':
+        return simulator.generate_fallback_question(question_corpus)
+    
+    if QUESTION_LOG and simulator.major:
+        await asyncio.to_thread(
+            append_record, QUESTION_LOG, simulator.major, simulator.get_year_label(),
+            stat_bucket(simulator.stats), question_data,
+        )
+    simulator.record_question(question_data)
+    return question_data
+
+
+def question_response(simulator: CollegeSimulator, question_data: Dict) -> QuestionResponse:
+    """Build the client response for a question, without the answers' effects"""
+    with profiling.phase("response_model"):
         clean_answers = [
             AnswerData(
                 id=answer["id"],
@@ -92,7 +285,7 @@ async def get_question(game_id: str):
             )
             for answer in question_data["answers"]
         ]
-        
+    
         return QuestionResponse(
             question=question_data["question"],
             year=question_data["year"],
@@ -102,7 +295,202 @@ async def get_question(game_id: str):
             total_questions=20,
             game_over=False
         )
+
+
+def resolve_choice(game_id: str, simulator: CollegeSimulator, choice_id: str) -> Tuple[List[GameEvent], Optional[QuestionResponse]]:
+    """Apply a choice and run the end-of-turn checks.
+    
+    Returns the crisis events triggered this turn and, if the game ended, the game-over response.
+    """
+    # Check if we have a current question
+    if simulator.current_question is None:
+        raise HTTPException(status_code=400, detail="No active question")
+    
+    if simulator.outcome is not None:
+        raise HTTPException(status_code=400, detail="Game is over")
+    
+    # Apply the choice
+    simulator.apply_choice(simulator.current_question, choice_id)
+    
+    # Check for game over conditions
+    outcome = None
+    crisis_events: List[GameEvent] = []
+    
+    # Check crisis events (non-terminal)
+    if simulator.question_count > 1:
+        crisis_events = simulator.check_stat_crisis_events()
+        
+        # Check for dropout
+        if simulator.is_past_first_year():
+            simulator.check_dropout_warning()
+            if simulator.check_dropout_resolution() == 'dropout':
+                outcome = 'dropout'
+    
+    # Check graduation
+    if simulator.check_graduation():
+        outcome = 'graduated'
+    
+    if outcome is None:
+        return crisis_events, None
+    
+    simulator.outcome = outcome
+    game_stats.record_game(simulator, outcome)
+    if exporter:
+        exporter.record_game(game_id, simulator, outcome)
+    
+    return crisis_events, final_response(simulator)
+
+
+def final_response(simulator: CollegeSimulator) -> QuestionResponse:
+    """Final response for a finished game (simulator.outcome is set)"""
+    if simulator.outcome == 'dropout':
+        game_over_message = f"After {simulator.question_count} questions into your {simulator.major} degree, the weight of your struggles became too much to bear. You've decided to take a leave of absence from college."
+    else:
+        avg_stat = simulator.stats.get_average()
         
+        if avg_stat >= 80:
+            game_over_message = f"🎓 Congratulations! You've graduated with your degree in {simulator.major} - Summa Cum Laude! You excelled in all aspects of college life!"
+        elif avg_stat >= 70:
+            game_over_message = f"🎓 Congratulations! You've graduated with your degree in {simulator.major} - Magna Cum Laude! You had a well-rounded college experience!"
+        elif avg_stat >= 60:
+            game_over_message = f"🎓 Congratulations! You've graduated with your degree in {simulator.major} - Cum Laude! You successfully balanced the challenges of college!"
+        else:
+            game_over_message = f"🎓 Congratulations! You've graduated with your degree in {simulator.major}! College was tough, but you persevered!"
+    
+    return QuestionResponse(
+        question=game_over_message,
+        year=simulator.get_year_label(),
+        major=simulator.major,
+        answers=[],
+        question_number=simulator.question_count,
+        total_questions=20,
+        game_over=True,
+        game_over_message=game_over_message
+    )
+
+
+@app.get("/api/health")
+async def health():
+    """Liveness: the server is up and accepting connections"""
+    return {"status": "ok"}
+
+
+@app.get("/api/ready")
+async def ready():
+    """Readiness: 200 once the LLM client is initialized, 503 until then"""
+    if llm.model is not None:
+        return {"status": "ready", "llm_ready": True}
+    
+    return JSONResponse(
+        status_code=503,
+        content={"status": "starting" if llm.error is None else "error", "llm_ready": False, "detail": llm.error}
+    )
+
+
+@app.post("/api/game/new", response_model=GameCreateResponse)
+async def create_game():
+    """Create a new game session (works while the LLM is down: questions fall back to local ones)"""
+    game_id = str(uuid.uuid4())
+    games[game_id] = CollegeSimulator(model=llm.model)
+    
+    return GameCreateResponse(
+        game_id=game_id,
+        message="Game created successfully"
+    )
+
+
+@app.post("/api/games/batch", response_model=BatchCreateResponse)
+async def create_games(request: BatchCreateRequest):
+    """Create several games at once, each with its first (major selection) question"""
+    if not 1 <= request.count <= MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {MAX_BATCH_SIZE}")
+    
+    created = []
+    for _ in range(request.count):
+        game_id = str(uuid.uuid4())
+        simulator = CollegeSimulator(model=llm.model)
+        games[game_id] = simulator
+        
+        # The major selection question is local, so this never waits on the LLM
+        question_data = await next_question(simulator)
+        simulator.current_question = question_data
+        created.append(BatchGame(game_id=game_id, question=question_response(simulator, question_data)))
+    
+    return BatchCreateResponse(games=created)
+
+
+@app.post("/api/games/choices")
+async def submit_choices(request: BatchChoiceRequest):
+    """Submit choices for many games at once.
+    
+    Streams newline-delimited JSON, one line per game as soon as its next question is ready:
+      {"game_id": ..., "status": 200, "events": [...], "response": QuestionResponse}
+      {"game_id": ..., "status": 404, "error": ...}
+    """
+    if len(request.choices) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} choices per batch")
+    
+    game_ids = [choice.game_id for choice in request.choices]
+    if len(set(game_ids)) != len(game_ids):
+        raise HTTPException(status_code=400, detail="Each game may appear only once per batch")
+    
+    # Generation for the whole batch is dispatched together, at most BATCH_CONCURRENCY at a time
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def play(choice: ChoiceRequest) -> Dict:
+        if choice.game_id not in games:
+            return {"game_id": choice.game_id, "status": 404, "error": "Game not found"}
+        
+        simulator = games[choice.game_id]
+        try:
+            async with game_lock(choice.game_id):
+                events, response = resolve_choice(choice.game_id, simulator, choice.choice_id)
+                if response is None:
+                    async with slots:
+                        question_data = await next_question(simulator)
+                    simulator.current_question = question_data
+                    response = question_response(simulator, question_data)
+            
+            return {
+                "game_id": choice.game_id,
+                "status": 200,
+                "events": [{"type": e.type, "message": e.message} for e in events],
+                "response": response.model_dump(),
+            }
+        except HTTPException as e:
+            return {"game_id": choice.game_id, "status": e.status_code, "error": e.detail}
+        except Exception as e:
+            return {"game_id": choice.game_id, "status": 500, "error": f"Error processing choice: {str(e)}"}
+    
+    async def results():
+        for result in asyncio.as_completed([play(choice) for choice in request.choices]):
+            yield json.dumps(await result) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@app.get("/api/game/{game_id}/question", response_model=QuestionResponse)
+async def get_question(game_id: str):
+    """Get the current/next question for a game"""
+    if game_id not in games:
+        raise HTTPException(status_code=404, detail="Game not found")
+    
+    simulator = games[game_id]
+    
+    try:
+        async with game_lock(game_id):
+            if simulator.outcome is not None:
+                return final_response(simulator)
+            
+            question_data = await next_question(simulator)
+            
+            # Store the question for later use when submitting choice
+            simulator.current_question = question_data
+            
+            return question_response(simulator, question_data)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating question: {str(e)}")
 
@@ -116,81 +504,116 @@ async def submit_choice(choice: ChoiceRequest):
     simulator = games[choice.game_id]
     
     try:
-        # Check if we have a current question
-        if not hasattr(simulator, 'current_question') or simulator.current_question is None:
-            raise HTTPException(status_code=400, detail="No active question")
-        
-        # Apply the choice
-        simulator.apply_choice(simulator.current_question, choice.choice_id)
-        
-        # Check for game over conditions
-        game_over = False
-        game_over_message = None
-        
-        # Check crisis events (non-terminal)
-        if simulator.question_count > 1:
-            crisis_events = simulator.check_stat_crisis_events()
+        async with game_lock(choice.game_id):
+            _, game_over_response = resolve_choice(choice.game_id, simulator, choice.choice_id)
+            if game_over_response:
+                return game_over_response
             
-            # Check for dropout
-            if simulator.is_past_first_year():
-                simulator.check_dropout_warning()
-                dropout_result = simulator.check_dropout_resolution()
-                
-                if dropout_result == 'dropout':
-                    game_over = True
-                    game_over_message = f"After {simulator.question_count} questions into your {simulator.major} degree, the weight of your struggles became too much to bear. You've decided to take a leave of absence from college."
-        
-        # Check graduation
-        if simulator.check_graduation():
-            game_over = True
-            avg_stat = simulator.stats.get_average()
+            # Generate next question
+            question_data = await next_question(simulator)
+            simulator.current_question = question_data  # Store for next choice submission
             
-            if avg_stat >= 80:
-                game_over_message = f"🎓 Congratulations! You've graduated with your degree in {simulator.major} - Summa Cum Laude! You excelled in all aspects of college life!"
-            elif avg_stat >= 70:
-                game_over_message = f"🎓 Congratulations! You've graduated with your degree in {simulator.major} - Magna Cum Laude! You had a well-rounded college experience!"
-            elif avg_stat >= 60:
-                game_over_message = f"🎓 Congratulations! You've graduated with your degree in {simulator.major} - Cum Laude! You successfully balanced the challenges of college!"
-            else:
-                game_over_message = f"🎓 Congratulations! You've graduated with your degree in {simulator.major}! College was tough, but you persevered!"
+            return question_response(simulator, question_data)
         
-        if game_over:
-            return QuestionResponse(
-                question=game_over_message or "",
-                year=simulator.get_year_label(),
-                major=simulator.major,
-                answers=[],
-                question_number=simulator.question_count,
-                total_questions=20,
-                game_over=True,
-                game_over_message=game_over_message
-            )
-        
-        # Generate next question
-        question_data = simulator.generate_question()
-        simulator.current_question = question_data  # Store for next choice submission
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing choice: {str(e)}")
+
+
+@app.websocket("/api/game/{game_id}/ws")
+async def game_channel(websocket: WebSocket, game_id: str):
+    """Play a game over a single connection.
+    
+    The client sends each choice id ("A1" or "A2") as a text frame. The server pushes:
+      {"type": "question", ...QuestionResponse}
+      {"type": "events", "events": [{"type": ..., "message": ...}]}   crisis events, as soon as the turn resolves
+      {"type": "game_over", ...QuestionResponse}
+      {"type": "error", "detail": ...}
+    """
+    # Accept before closing: a close before accept() is a bare 403 handshake rejection,
+    # which hides the close code and reason from the browser
+    await websocket.accept()
+    if game_id not in games:
+        await websocket.close(code=4404, reason="Game not found")
+        return
+    
+    simulator = games[game_id]
+    profile_turns = websocket.query_params.get("profile") == "1"
+    
+    def turn_profile():
+        """Profile one turn into the ring when this channel opted in or the turn is sampled"""
+        if profile_ring is None or not (profile_turns or profiling.sampled(PROFILE_SAMPLE_RATE)):
+            return nullcontext()
+        return profiling.profiled(profile_ring, profiling.request_name("WS", f"/api/game/{game_id}/turn"), PROFILE_INTERVAL)
+    
+    async def push_question(question_data: Dict):
+        await websocket.send_json({"type": "question", **question_response(simulator, question_data).model_dump()})
+    
+    try:
+        # Resume the question in progress, start the game, or repeat the ending of a finished one
+        async with game_lock(game_id):
+            if simulator.outcome is not None:
+                await websocket.send_json({"type": "game_over", **final_response(simulator).model_dump()})
+                await websocket.close()
+                return
+            
+            if simulator.current_question is None:
+                simulator.current_question = await next_question(simulator)
+            await push_question(simulator.current_question)
         
-        # Remove effects from answers
-        clean_answers = [
-            AnswerData(
-                id=answer["id"],
-                text=answer["text"]
-            )
-            for answer in question_data["answers"]
-        ]
+        while True:
+            choice_id = (await websocket.receive_text()).strip()
+            
+            try:
+                async with turn_profile(), game_lock(game_id):
+                    events, game_over_response = resolve_choice(game_id, simulator, choice_id)
+                    if events:
+                        await websocket.send_json({
+                            "type": "events",
+                            "events": [{"type": e.type, "message": e.message} for e in events]
+                        })
+                    
+                    if game_over_response:
+                        await websocket.send_json({"type": "game_over", **game_over_response.model_dump()})
+                        break
+                    
+                    question_data = await next_question(simulator)
+                    simulator.current_question = question_data
+                    await push_question(question_data)
+                
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "detail": e.detail})
+            except Exception as e:
+                await websocket.send_json({"type": "error", "detail": f"Error processing choice: {str(e)}"})
         
-        return QuestionResponse(
-            question=question_data["question"],
-            year=question_data["year"],
-            major=simulator.major,
-            answers=clean_answers,
-            question_number=simulator.question_count,
-            total_questions=20,
-            game_over=False
-        )
+        await websocket.close()
         
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing choice: {str(e)}")
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/api/game/{game_id}/odds")
+async def get_odds(game_id: str):
+    """Chance to graduate from the game's current state"""
+    if game_id not in games:
+        raise HTTPException(status_code=404, detail="Game not found")
+    
+    if odds_table is None:
+        raise HTTPException(status_code=503, detail="Odds table not loaded")
+    
+    chance = odds_table.chance_to_graduate(games[game_id])
+    return {"graduate": round(chance, 4), "dropout": round(1 - chance, 4)}
+
+
+@app.get("/api/stats")
+async def get_stats(raw: bool = False):
+    """Aggregate outcome statistics across all finished games.
+    
+    raw=true returns the mergeable snapshot instead of the dashboard summary.
+    """
+    merged = await asyncio.to_thread(merged_stats, game_stats, STATS_SNAPSHOT_DIR)
+    return merged.snapshot() if raw else merged.summary()
 
 
 @app.delete("/api/game/{game_id}")
@@ -200,6 +623,7 @@ async def delete_game(game_id: str):
         raise HTTPException(status_code=404, detail="Game not found")
     
     del games[game_id]
+    game_locks.pop(game_id, None)
     return {"message": "Game deleted successfully"}
 
 
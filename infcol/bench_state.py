@@ -0,0 +1,143 @@
+# bench_state.py
+#
+# Measures bytes of game state held per live session, comparing the old
+# plain-dataclass layout against real CollegeSimulator sessions, which
+# use the slotted layout in game_state.py plus everything else a session
+# holds (summaries, prompt builder, ...).
+#
+#   python bench_state.py [session counts...]   (default: 2000 10000)
+
+import contextlib
+import io
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from game_state import GameEvent
+from infcollege import CollegeSimulator
+
+TURNS = 20
+QUESTION_TEXT = "Your {major} midterm is tomorrow and your roommate is throwing a party tonight. Turn {turn} of your college journey is here. What do you do?"
+ANSWER_TEXT = "Option {n} for turn {turn}: a tempting choice with consequences"
+SUMMARY_TEXT = "Turn {turn}: the student weighed a {major} deadline against their social life and health."
+EVENT_TYPES = ['academic_suspension', 'medical_leave', 'mental_health_crisis', 'dropout_warning']
+
+
+@dataclass
+class LegacyStats:
+    morale: int = 50
+    academics: int = 50
+    health: int = 50
+
+
+@dataclass
+class LegacyDecision:
+    question_num: int
+    question: str
+    choice: str
+    effects: Dict[str, Optional[int]]
+
+
+@dataclass
+class LegacyGameEvent:
+    type: str
+    message: str
+    question_num: int
+
+
+@dataclass
+class LegacySession:
+    """Per-session fields of the original CollegeSimulator"""
+    stats: LegacyStats = field(default_factory=LegacyStats)
+    decisions: List[LegacyDecision] = field(default_factory=list)
+    events: List[LegacyGameEvent] = field(default_factory=list)
+    question_count: int = 0
+    current_year: int = 1
+    dropout_warning_active: bool = False
+    warning_avg: float = 0.0
+    major: Optional[str] = None
+    offered_majors: List[str] = field(default_factory=list)
+    current_question: Optional[Dict] = None
+    long_term_summary: str = ""
+    question_summaries: List[str] = field(default_factory=list)
+
+
+def make_question(session: int, turn: int) -> Dict:
+    major = f"Major {session % 43}"
+    return {
+        "question": QUESTION_TEXT.format(major=major, turn=turn),
+        "year": f"Year {min(4, turn // 5 + 1)}",
+        "summary": SUMMARY_TEXT.format(major=major, turn=turn),
+        "answers": [
+            {"id": "A1", "text": ANSWER_TEXT.format(n=1, turn=turn), "effects": {"morale": 20, "academics": None, "health": -10}},
+            {"id": "A2", "text": ANSWER_TEXT.format(n=2, turn=turn), "effects": {"morale": -15, "academics": 25, "health": None}},
+        ]
+    }
+
+
+def event_message(session: int, turn: int) -> str:
+    return f"⚠️ Event at question {turn} for session {session}: stats fell to {turn + 10}/100."
+
+
+def build_legacy(session: int) -> LegacySession:
+    state = LegacySession(major=f"Major {session % 43}", offered_majors=[f"Major {session % 43}", "Other"])
+    for turn in range(1, TURNS + 1):
+        question = make_question(session, turn)
+        state.current_question = question
+        state.question_count = turn
+        state.question_summaries.append(question["summary"])
+        if len(state.question_summaries) >= 3:
+            third_most_recent = state.question_summaries[-3]
+            state.long_term_summary = f"{state.long_term_summary} {third_most_recent}" if state.long_term_summary else third_most_recent
+        answer = question["answers"][turn % 2]
+        state.decisions.append(LegacyDecision(turn, question["question"], answer["text"], answer["effects"]))
+        if turn % 5 == 0:
+            state.events.append(LegacyGameEvent(EVENT_TYPES[turn % 4], event_message(session, turn), turn))
+    return state
+
+
+def build_session(session: int) -> CollegeSimulator:
+    """A real session played the way the server plays it: LLM turns, with every fourth turn a local fallback"""
+    simulator = CollegeSimulator()
+    question = simulator.generate_question()  # Major selection
+    simulator.current_question = question
+    simulator.apply_choice(question, "A1")
+    for turn in range(2, TURNS + 1):
+        if turn % 4 == 0:
+            question = simulator.generate_fallback_question()
+        else:
+            simulator.build_prompt()
+            question = make_question(session, turn)
+            simulator.record_question(question)
+        simulator.current_question = question
+        simulator.apply_choice(question, question["answers"][turn % 2]["id"])
+        if turn % 5 == 0:
+            simulator.events.append(GameEvent(EVENT_TYPES[turn % 4], event_message(session, turn), turn))
+    return simulator
+
+
+def measure(builder, sessions: int) -> float:
+    """Return bytes of retained state per session"""
+    with contextlib.redirect_stdout(io.StringIO()):  # apply_choice announces the major
+        builder(0)  # Warm module-level caches so they aren't charged to sessions
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        live = [builder(i) for i in range(sessions)]
+        after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del live
+    return (after - before) / sessions
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [2_000, 10_000]
+    print(f"{'sessions':>10} {'legacy B/session':>18} {'session B/session':>18} {'saved':>8}")
+    for sessions in counts:
+        legacy = measure(build_legacy, sessions)
+        current = measure(build_session, sessions)
+        print(f"{sessions:>10} {legacy:>18.0f} {current:>18.0f} {1 - current / legacy:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# check_import_time.py
+#
+# Cold-start budget check: imports api_server in a fresh interpreter and fails
+# if it takes longer than the budget or pulls in the Gemini SDK eagerly.
+#
+#   python check_import_time.py [budget_ms]   (default: $IMPORT_BUDGET_MS or 1500)
+
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ['google.generativeai', 'grpc', 'google.protobuf', 'keyenv']
+
+PROBE = f"""
+import sys, time
+start = time.perf_counter()
+import api_server
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(f"{{elapsed_ms:.1f}}")
+print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+
+
+def slowest_imports(limit: int = 10):
+    """Return the slowest cumulative imports reported by -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import api_server'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main() -> int:
+    budget_ms = float(sys.argv[1] if len(sys.argv) > 1 else os.environ.get('IMPORT_BUDGET_MS', 1500))
+
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        return result.returncode
+
+    elapsed_line, heavy_line = result.stdout.splitlines()[-2:]
+    elapsed_ms = float(elapsed_line)
+    eager = [m for m in heavy_line.split(',') if m]
+
+    print(f"import api_server: {elapsed_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+
+    failed = False
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    if elapsed_ms > budget_ms:
+        print("FAIL: over budget. Slowest imports (cumulative us):")
+        for cumulative, name in slowest_imports():
+            print(f"  {cumulative:>10}  {name}")
+        failed = True
+
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# game_state.py
+
+import sys
+from array import array
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+# Stat order used by every packed effects array
+STAT_NAMES = ('morale', 'academics', 'health')
+
+# Marker for "no effect" (null) inside a packed effects array
+NO_EFFECT = -128
+
+
+def pack_effects(effects: Dict[str, Optional[int]]) -> array:
+    """Pack an effects dict into a 3-byte signed array (null -> NO_EFFECT)"""
+    packed = array('b')
+    for stat in STAT_NAMES:
+        value = effects.get(stat)
+        if value is None:
+            packed.append(NO_EFFECT)
+        else:
+            packed.append(max(-127, min(127, int(value))))
+    return packed
+
+
+def unpack_effects(packed: array) -> Dict[str, Optional[int]]:
+    """Expand a packed effects array back into the dict shape used by questions"""
+    return {
+        stat: (None if value == NO_EFFECT else value)
+        for stat, value in zip(STAT_NAMES, packed)
+    }
+
+
+@dataclass(slots=True)
+class Stats:
+    morale: int = 50
+    academics: int = 50
+    health: int = 50
+
+    def apply_effects(self, effects: Dict[str, Optional[int]]):
+        """Apply stat changes and clamp values between 0-100"""
+        self.morale = max(0, min(100, self.morale + (effects.get('morale') or 0)))
+        self.academics = max(0, min(100, self.academics + (effects.get('academics') or 0)))
+        self.health = max(0, min(100, self.health + (effects.get('health') or 0)))
+
+    def get_average(self) -> float:
+        """Calculate average of all stats"""
+        return (self.morale + self.academics + self.health) / 3
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class QuestionEntry:
+    """The live question awaiting a choice, with its answers' effects packed"""
+    question_id: int
+    year: str
+    answer_ids: Tuple[str, ...]
+    answer_texts: Tuple[str, ...]
+    answer_effects: Tuple[array, ...]
+
+
+class QuestionLog:
+    """Per-session store of every question text asked, referenced by integer id"""
+    __slots__ = ('texts',)
+
+    def __init__(self):
+        self.texts: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getitem__(self, question_id: int) -> str:
+        return self.texts[question_id]
+
+    def add(self, text: str) -> int:
+        """Store a question text and return its id, reusing the latest id if it is the same question"""
+        if self.texts and self.texts[-1] == text:
+            return len(self.texts) - 1
+        self.texts.append(text)
+        return len(self.texts) - 1
+
+    def add_question(self, question_data: Dict) -> QuestionEntry:
+        """Store a generated question and return its compact live entry"""
+        answers = question_data['answers']
+        return QuestionEntry(
+            question_id=self.add(question_data['question']),
+            year=sys.intern(question_data.get('year', '')),
+            answer_ids=tuple(sys.intern(a['id']) for a in answers),
+            answer_texts=tuple(a['text'] for a in answers),
+            answer_effects=tuple(pack_effects(a['effects']) for a in answers),
+        )
+
+    def as_dict(self, entry: QuestionEntry) -> Dict:
+        """Rebuild a question dict in the same shape as generate_question output"""
+        return {
+            "question": self.texts[entry.question_id],
+            "year": entry.year,
+            "answers": [
+                {"id": answer_id, "text": text, "effects": unpack_effects(effects)}
+                for answer_id, text, effects in zip(entry.answer_ids, entry.answer_texts, entry.answer_effects)
+            ]
+        }
+
+
+@dataclass(slots=True)
+class Decision:
+    question_num: int
+    question_id: int  # Index into the session's QuestionLog
+    choice: str
+    effects: array    # Packed as STAT_NAMES, see unpack_effects
+
+    def question(self, log: QuestionLog) -> str:
+        return log[self.question_id]
+
+
+@dataclass(slots=True)
+class GameEvent:
+    """Represents major events like suspensions, warnings, etc."""
+    type: str  # 'academic_suspension', 'medical_leave', 'mental_health_crisis', 'dropout_warning'
+    message: str
+    question_num: int
+
+    def __post_init__(self):
+        self.type = sys.intern(self.type)
@@ -0,0 +1,288 @@
+# game_stats.py
+#
+# In-process aggregate statistics over finished games. Every update is O(1)
+# in the number of games played, and snapshots are plain JSON that can be
+# merged across worker processes.
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from infcollege import CollegeSimulator
+
+OUTCOMES = ('graduated', 'dropout')
+CRISIS_TYPES = ('academic_suspension', 'medical_leave', 'mental_health_crisis', 'dropout_warning')
+
+
+class AverageSketch:
+    """Quantile sketch for Stats.get_average().
+
+    The average is always (morale + academics + health) / 3 with integer stats
+    in 0-100, so it takes one of 301 values. A histogram over the integer sum is
+    therefore an exact quantile sketch, O(1) to update and merged by addition.
+    """
+    BUCKETS = 301
+
+    def __init__(self, counts: Optional[List[int]] = None):
+        self.counts = counts or [0] * self.BUCKETS
+        self.total = sum(self.counts)
+
+    def add(self, average: float):
+        self.counts[max(0, min(self.BUCKETS - 1, round(average * 3)))] += 1
+        self.total += 1
+
+    def merge(self, other: "AverageSketch"):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Smallest average with at least a q fraction of games at or below it"""
+        if self.total == 0:
+            return None
+        target = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return round(i / 3, 1)
+        return round((self.BUCKETS - 1) / 3, 1)
+
+    def mean(self) -> Optional[float]:
+        if self.total == 0:
+            return None
+        return round(sum(i * count for i, count in enumerate(self.counts)) / 3 / self.total, 2)
+
+
+class GameStats:
+    """Counters and sketches over every game that has ended in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.outcomes: Counter = Counter()
+        self.by_major: Dict[str, Counter] = defaultdict(Counter)  # major -> outcome counts
+        self.crises_by_major: Dict[str, Counter] = defaultdict(Counter)  # major -> event type counts
+        self.crises_by_year: Dict[str, Counter] = defaultdict(Counter)  # year label -> event type counts
+        self.averages = {outcome: AverageSketch() for outcome in OUTCOMES}
+        self.question_sources: Counter = Counter()  # 'llm', 'fallback_timeout', 'fallback_error', 'fallback_budget'
+        self.prompts: Counter = Counter()  # 'requests', 'tokens', 'trimmed' (requests with context dropped)
+        self.max_prompt_tokens = 0
+
+    def record_game(self, simulator, outcome: str):
+        """Fold a finished game into the aggregates"""
+        major = simulator.major or "Undeclared"
+        # Games are at most 20 turns, so this is bounded by a small constant
+        events = [(e.type, year_label(e.question_num)) for e in simulator.events]
+
+        with self._lock:
+            self.outcomes[outcome] += 1
+            self.by_major[major][outcome] += 1
+            self.averages[outcome].add(simulator.stats.get_average())
+            for event_type, year in events:
+                self.crises_by_major[major][event_type] += 1
+                self.crises_by_year[year][event_type] += 1
+
+    def record_question_source(self, source: str):
+        """Count where a generated question came from (LLM or local fallback)"""
+        with self._lock:
+            self.question_sources[source] += 1
+
+    def record_prompt(self, tokens: int, trimmed: int):
+        """Count the estimated size of a prompt sent to the LLM"""
+        with self._lock:
+            self.prompts['requests'] += 1
+            self.prompts['tokens'] += tokens
+            self.prompts['trimmed'] += bool(trimmed)
+            self.max_prompt_tokens = max(self.max_prompt_tokens, tokens)
+
+    def snapshot(self) -> Dict:
+        """Raw, mergeable state as JSON-serializable data"""
+        with self._lock:
+            return {
+                "outcomes": dict(self.outcomes),
+                "by_major": {k: dict(v) for k, v in self.by_major.items()},
+                "crises_by_major": {k: dict(v) for k, v in self.crises_by_major.items()},
+                "crises_by_year": {k: dict(v) for k, v in self.crises_by_year.items()},
+                "averages": {k: list(v.counts) for k, v in self.averages.items()},
+                "question_sources": dict(self.question_sources),
+                "prompts": {**self.prompts, "max_tokens": self.max_prompt_tokens},
+            }
+
+    def merge_snapshot(self, snapshot: Dict):
+        """Add another process's snapshot into this one"""
+        with self._lock:
+            self.outcomes.update(snapshot["outcomes"])
+            self.question_sources.update(snapshot.get("question_sources", {}))
+            prompts = dict(snapshot.get("prompts", {}))
+            self.max_prompt_tokens = max(self.max_prompt_tokens, prompts.pop("max_tokens", 0))
+            self.prompts.update(prompts)
+            for field in ("by_major", "crises_by_major", "crises_by_year"):
+                target = getattr(self, field)
+                for key, counts in snapshot[field].items():
+                    target[key].update(counts)
+            for outcome, counts in snapshot["averages"].items():
+                self.averages[outcome].merge(AverageSketch(list(counts)))
+
+    def summary(self) -> Dict:
+        """Dashboard view: rates, average-stat quantiles and crisis frequencies"""
+        snapshot = self.snapshot()
+        total = sum(snapshot["outcomes"].values())
+        questions = sum(snapshot["question_sources"].values())
+        prompts = snapshot["prompts"]
+
+        def rates(counts: Dict[str, int]) -> Dict:
+            games = sum(counts.get(o, 0) for o in OUTCOMES)
+            return {
+                "games": games,
+                **{f"{o}_rate": round(counts.get(o, 0) / games, 4) if games else None for o in OUTCOMES},
+            }
+
+        def distribution(sketch: AverageSketch) -> Dict:
+            return {
+                "count": sketch.total,
+                "mean": sketch.mean(),
+                **{f"p{int(q * 100)}": sketch.quantile(q) for q in (0.1, 0.25, 0.5, 0.75, 0.9)},
+            }
+
+        all_averages = AverageSketch()
+        for sketch in self.averages.values():
+            all_averages.merge(sketch)
+
+        return {
+            "games": total,
+            **rates(snapshot["outcomes"]),
+            "final_average": {
+                "all": distribution(all_averages),
+                **{o: distribution(AverageSketch(list(snapshot["averages"][o]))) for o in OUTCOMES},
+            },
+            "by_major": {major: rates(counts) for major, counts in snapshot["by_major"].items()},
+            "crises_per_game_by_major": {
+                major: {t: round(n / max(1, sum(snapshot["by_major"].get(major, {}).values())), 4) for t, n in counts.items()}
+                for major, counts in snapshot["crises_by_major"].items()
+            },
+            "crises_by_year": snapshot["crises_by_year"],
+            "question_sources": snapshot["question_sources"],
+            "fallback_rate": round(1 - snapshot["question_sources"].get("llm", 0) / questions, 4) if questions else None,
+            "prompt_tokens": {
+                "requests": prompts.get("requests", 0),
+                "mean": round(prompts["tokens"] / prompts["requests"], 1) if prompts.get("requests") else None,
+                "max": prompts["max_tokens"],
+                "trimmed_rate": round(prompts["trimmed"] / prompts["requests"], 4) if prompts.get("requests") else None,
+            },
+        }
+
+
+def year_label(question_num: int) -> str:
+    """Year label for a question number, as CollegeSimulator.get_year_label computes it"""
+    return CollegeSimulator.year_label(question_num)
+
+
+_process_id: Optional[str] = None
+_process_pid: Optional[int] = None
+
+
+def process_id() -> str:
+    """Random id for this process. PIDs repeat across container restarts, so they can't name snapshots."""
+    global _process_id, _process_pid
+    if _process_pid != os.getpid():  # Also regenerated in forked workers
+        _process_id = uuid.uuid4().hex
+        _process_pid = os.getpid()
+    return _process_id
+
+
+# Snapshots of workers that stopped publishing are folded into this file, so the
+# directory holds one file per live worker plus this one
+RETIRED_SNAPSHOT = "stats-retired.json"
+
+
+def write_json(path: str, data: Dict):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+def write_snapshot(stats: GameStats, snapshot_dir: str):
+    """Atomically publish this process's snapshot for other workers to merge"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    write_json(os.path.join(snapshot_dir, f"stats-{process_id()}.json"), stats.snapshot())
+
+
+def compact_snapshots(snapshot_dir: str, stale_after: float):
+    """Fold snapshots not rewritten for stale_after seconds (dead workers) into the retired snapshot.
+
+    Runs under an exclusive lock on the directory. The retired snapshot lists the
+    files already folded into it, so a crash between writing it and deleting them
+    can't count them twice.
+    """
+    import fcntl
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    with open(os.path.join(snapshot_dir, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        retired_path = os.path.join(snapshot_dir, RETIRED_SNAPSHOT)
+        retired = GameStats()
+        folded: List[str] = []
+        if os.path.exists(retired_path):
+            with open(retired_path) as f:
+                data = json.load(f)
+            retired.merge_snapshot(data)
+            folded = data.get("folded", [])
+
+        own = f"stats-{process_id()}.json"
+        cutoff = time.time() - stale_after
+        names = set(os.listdir(snapshot_dir))
+        stale = []
+        for name in sorted(names):
+            if name in (own, RETIRED_SNAPSHOT) or not (name.startswith("stats-") and name.endswith(".json")):
+                continue
+            path = os.path.join(snapshot_dir, name)
+            try:
+                if name not in folded and os.path.getmtime(path) < cutoff:
+                    with open(path) as f:
+                        retired.merge_snapshot(json.load(f))
+                    stale.append(name)
+            except (OSError, ValueError) as e:
+                print(f"Skipping stats snapshot {name}: {e}")
+
+        # Forget folded names whose files are gone; remember the ones about to be deleted
+        folded = [name for name in folded if name in names] + stale
+        if stale:
+            write_json(retired_path, {**retired.snapshot(), "folded": folded})
+
+        for name in folded:
+            try:
+                os.remove(os.path.join(snapshot_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+def merged_stats(stats: GameStats, snapshot_dir: Optional[str]) -> GameStats:
+    """This process's live stats merged with the latest snapshots of other workers"""
+    merged = GameStats()
+    merged.merge_snapshot(stats.snapshot())
+    if not snapshot_dir or not os.path.isdir(snapshot_dir):
+        return merged
+
+    own = f"stats-{process_id()}.json"
+    names = os.listdir(snapshot_dir)
+    folded = set()
+    if RETIRED_SNAPSHOT in names:
+        # Put the retired snapshot first so files it already holds are skipped
+        names.remove(RETIRED_SNAPSHOT)
+        names.insert(0, RETIRED_SNAPSHOT)
+    for name in names:
+        if name == own or name in folded or not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(snapshot_dir, name)) as f:
+                snapshot = json.load(f)
+            folded.update(snapshot.get("folded", []))
+            merged.merge_snapshot(snapshot)
+        except (OSError, ValueError) as e:
+            print(f"Skipping stats snapshot {name}: {e}")
+    return merged
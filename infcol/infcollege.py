@@ -4,10 +4,13 @@ import os
 import json
 import re
 import random
-import google.generativeai as genai
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
-import keyenv
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from game_state import Stats, Decision, GameEvent, QuestionEntry, QuestionLog, pack_effects
+from prompt_builder import PromptBuilder
+from template_questions import generate_template_question
+import profiling
 
 # College Majors List
 COLLEGE_MAJORS = [
@@ -56,41 +59,27 @@ COLLEGE_MAJORS = [
     "Underwater Basket Weaving"
 ]
 
-@dataclass
-class Stats:
-    morale: int = 50
-    academics: int = 50
-    health: int = 50
-    
-    def apply_effects(self, effects: Dict[str, Optional[int]]):
-        """Apply stat changes and clamp values between 0-100"""
-        self.morale = max(0, min(100, self.morale + (effects.get('morale') or 0)))
-        self.academics = max(0, min(100, self.academics + (effects.get('academics') or 0)))
-        self.health = max(0, min(100, self.health + (effects.get('health') or 0)))
-    
-    def get_average(self) -> float:
-        """Calculate average of all stats"""
-        return (self.morale + self.academics + self.health) / 3
-    
-    def to_dict(self):
-        return asdict(self)
+MODEL_NAME = 'gemini-2.5-flash'
 
+# Estimated tokens allowed per question prompt; older context is trimmed to fit
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', 4000))
 
-@dataclass
-class Decision:
-    question_num: int
-    question: str
-    choice: str
-    effects: Dict[str, Optional[int]]
 
+def get_api_key() -> Optional[str]:
+    """Load the Gemini API key, importing keyenv only when it is first needed"""
+    try:
+        import keyenv  # noqa: F401 - populates the environment on import
+    except ImportError:
+        pass
+    return os.environ.get('GEMINI_KEY')
 
-@dataclass
-class GameEvent:
-    """Represents major events like suspensions, warnings, etc."""
-    type: str  # 'academic_suspension', 'medical_leave', 'mental_health_crisis', 'dropout_warning'
-    message: str
-    question_num: int
 
+def create_model(api_key: str):
+    """Import the Gemini SDK and build a model client (slow: loads gRPC/protobuf)"""
+    import google.generativeai as genai
+    
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(MODEL_NAME)
 
 class CollegeSimulator:
     SYSTEM_PROMPT = """You are a college life simulator game master. Your role is to generate realistic college scenarios that create a compelling narrative journey from Year 1 to Graduation.
@@ -222,10 +211,15 @@ Generate engaging, realistic scenarios that make the player feel the weight of t
     DROPOUT_WARNING_THRESHOLD = 35  # Average below this triggers dropout warning
     DROPOUT_CHECK_THRESHOLD = 35    # Average must rise above this to avoid dropout
     CRITICAL_STAT_THRESHOLD = 15    # Individual stat threshold for crisis events
+    FIRST_YEAR_QUESTIONS = 5        # Dropout checks start once this many questions are asked
+    GRADUATION_QUESTIONS = 20       # Questions needed to graduate
+    
+    # Effect of declaring either offered major
+    MAJOR_SELECTION_EFFECTS = {"morale": 15, "academics": None, "health": None}
     
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+    def __init__(self, api_key: Optional[str] = None, model=None):
+        self.api_key = api_key
+        self.model = model  # Shared client from the server, or created on first LLM question
         self.stats = Stats()
         self.decisions: List[Decision] = []
         self.events: List[GameEvent] = []
@@ -234,21 +228,39 @@ Generate engaging, realistic scenarios that make the player feel the weight of t
         self.dropout_warning_active = False
         self.warning_avg = 0.0
         self.major: Optional[str] = None
+        self.outcome: Optional[str] = None  # 'graduated' or 'dropout' once the game has ended
         self.offered_majors: List[str] = []
-        self.current_question: Optional[Dict] = None  # Store current question for API
+        self.questions = QuestionLog()  # Every question text asked, stored once and referenced by id
+        self.current_entry: Optional[QuestionEntry] = None
         self.long_term_summary: str = ""  # Cumulative summary of past decisions
-        self.question_summaries: List[str] = []  # Store all question summaries
+        self.question_summaries: Deque[str] = deque(maxlen=3)  # Only the last 3 feed the long-term summary
+        self.prompt_builder = PromptBuilder(self.SYSTEM_PROMPT, PROMPT_TOKEN_BUDGET)
+    
+    @property
+    def current_question(self) -> Optional[Dict]:
+        """Current question for the API, rebuilt from the question log"""
+        if self.current_entry is None:
+            return None
+        return self.questions.as_dict(self.current_entry)
+    
+    @current_question.setter
+    def current_question(self, question_data: Optional[Dict]):
+        self.current_entry = None if question_data is None else self.questions.add_question(question_data)
         
-    def get_year_label(self) -> str:
-        """Convert question count to year label"""
+    @classmethod
+    def year_label(cls, question_count: int) -> str:
+        """Year label for a question count (each year is FIRST_YEAR_QUESTIONS questions long)"""
         years = {1: "Year 1", 2: "Year 2", 3: "Year 3", 4: "Year 4"}
-        # Roughly 10 questions per year for a 40-question game
-        year_num = min(4, (self.question_count // 5) + 1)
+        year_num = min(4, (question_count // cls.FIRST_YEAR_QUESTIONS) + 1)
         return years[year_num]
     
+    def get_year_label(self) -> str:
+        """Convert question count to year label"""
+        return self.year_label(self.question_count)
+    
     def is_past_first_year(self) -> bool:
         """Check if player is past first year (question 11+)"""
-        return self.question_count >= 5
+        return self.question_count >= self.FIRST_YEAR_QUESTIONS
     
     def generate_major_selection_question(self) -> Dict:
         """Generate the first question to select a major"""
@@ -262,20 +274,12 @@ Generate engaging, realistic scenarios that make the player feel the weight of t
                 {
                     "id": "A1",
                     "text": f"Declare {self.offered_majors[0]} as your major",
-                    "effects": {
-                        "morale": 15,
-                        "academics": None,
-                        "health": None
-                    }
+                    "effects": dict(self.MAJOR_SELECTION_EFFECTS)
                 },
                 {
                     "id": "A2",
                     "text": f"Declare {self.offered_majors[1]} as your major",
-                    "effects": {
-                        "morale": 15,
-                        "academics": None,
-                        "health": None
-                    }
+                    "effects": dict(self.MAJOR_SELECTION_EFFECTS)
                 }
             ]
         }
@@ -292,57 +296,6 @@ Generate engaging, realistic scenarios that make the player feel the weight of t
         
         print(f"\n🎓 You've declared {self.major} as your major!")
     
-    def build_context_prompt(self) -> str:
-        """Build context from previous decisions and current stats"""
-        if not self.major:
-            # This shouldn't happen after the first question
-            return "This is the first question. The student is just starting their college journey as a freshman."
-        
-        context = f"""
-Current Game State:
-- Year: {self.get_year_label()}
-- Major: {self.major}
-- Current Stats: Morale: {self.stats.morale}, Academics: {self.stats.academics}, Health: {self.stats.health}
-- Average Stats: {self.stats.get_average():.1f}
-- Questions Answered: {self.question_count}
-"""
-        
-        # Add long-term summary if it exists
-        if self.long_term_summary:
-            context += f"\nLong-term Journey Summary:\n{self.long_term_summary}\n"
-        
-        # Add stat warnings
-        stat_warnings = []
-        if self.stats.morale < 30:
-            stat_warnings.append("⚠️ Morale is very low - student is struggling mentally")
-        if self.stats.academics < 30:
-            stat_warnings.append("⚠️ Academics are very low - student is at risk of failing")
-        if self.stats.health < 30:
-            stat_warnings.append("⚠️ Health is very low - student is physically struggling")
-        
-        if stat_warnings:
-            context += "\nCurrent Struggles:\n"
-            for warning in stat_warnings:
-                context += f"- {warning}\n"
-        
-        # Add major events to context
-        if self.events:
-            context += "\nMajor Events:\n"
-            for event in self.events[-3:]:  # Last 3 events
-                context += f"- {event.message}\n"
-        
-        # Add dropout warning if active
-        if self.dropout_warning_active:
-            context += f"\n⚠️ CRITICAL: Student is on dropout warning! Average was {self.warning_avg:.1f}. They need to improve their overall situation or they may drop out. Generate a scenario that offers opportunities for recovery but also risks of further decline.\n"
-        
-        context += "\nRecent Decisions:\n"
-        # Include last 3 decisions for context
-        for decision in self.decisions[-3:]:
-            context += f"- Q{decision.question_num}: {decision.question}\n  Choice: {decision.choice}\n"
-        
-        context += f"\nGenerate the next question that follows naturally from these past decisions, current stats, major events, and the student's major ({self.major}). Remember to vary your choice structures - not every choice should be a balanced trade-off! Incorporate major-specific content when appropriate."
-        return context
-    
     def clean_json_response(self, response_text: str) -> str:
         """Clean the JSON response to fix common formatting issues"""
         # Remove markdown code blocks if present
@@ -357,54 +310,92 @@ Current Game State:
         
         return response_text.strip()
     
-    def generate_question(self) -> Dict:
-        """Request Gemini to generate a new question"""
-        # First question is always major selection
-        if self.question_count == 0:
-            return self.generate_major_selection_question()
-        
-        context = self.build_context_prompt()
-        
-        prompt = f"{self.SYSTEM_PROMPT}\n\n{context}\n\nRespond ONLY with the JSON object, no additional text."
+    def build_prompt(self) -> str:
+        """Full prompt for the next LLM question; raises PromptBudgetError if it can't fit the token budget"""
+        with profiling.phase("build_prompt"):
+            return self.prompt_builder.build(self)
+    
+    def request_question(self, prompt: str, timeout: Optional[float] = None) -> Dict:
+        """Call Gemini and parse its question. Doesn't touch game state, so it is safe to abandon."""
+        if self.model is None:
+            with profiling.phase("sdk_init"):
+                self.model = create_model(self.api_key)
+        
+        with profiling.phase("sdk_generate"):
+            if timeout is None:
+                response = self.model.generate_content(prompt)
+            else:
+                response = self.model.generate_content(prompt, request_options={"timeout": timeout})
         
         try:
-            response = self.model.generate_content(prompt)
-            
-            # Extract and clean JSON from response
-            response_text = self.clean_json_response(response.text)
-            
-            question_data = json.loads(response_text)
-            self.question_count += 1
-            
-            # Store the summary from this question
-            current_summary = question_data.get('summary', '')
-            if current_summary:
-                self.question_summaries.append(current_summary)
-            
-            # Update long-term summary using 3rd most recent
-            # When we have 3+ summaries, compound the 3rd most recent into long-term
-            if len(self.question_summaries) >= 3:
-                # Get the 3rd most recent summary (index -3)
-                third_most_recent = self.question_summaries[-3]
-                
-                # Compound it into long-term summary
-                if self.long_term_summary:
-                    # Add to existing summary
-                    self.long_term_summary = f"{self.long_term_summary} {third_most_recent}"
-                else:
-                    # First time: start with the 3rd summary
-                    self.long_term_summary = third_most_recent
-            
-            return question_data
-            
+            with profiling.phase("json_cleanup"):
+                # Extract and clean JSON from response
+                response_text = self.clean_json_response(response.text)
+                return json.loads(response_text)
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON: {e}")
             print(f"Response text: {response.text}")
             print(f"Cleaned text: {response_text}")
             raise
+    
+    def record_question(self, question_data: Dict):
+        """Advance the game to a newly generated question and fold in its summary"""
+        self.question_count += 1
+        
+        # Store the summary from this question
+        current_summary = question_data.get('summary', '')
+        if current_summary:
+            self.question_summaries.append(current_summary)
+        
+        # Update long-term summary using 3rd most recent
+        # When we have 3+ summaries, compound the 3rd most recent into long-term
+        if len(self.question_summaries) >= 3:
+            # Get the 3rd most recent summary (index -3)
+            third_most_recent = self.question_summaries[-3]
+            
+            # Compound it into long-term summary
+            if self.long_term_summary:
+                # Add to existing summary
+                self.long_term_summary = f"{self.long_term_summary} {third_most_recent}"
+            else:
+                # First time: start with the 3rd summary
+                self.long_term_summary = third_most_recent
+    
+    def generate_question(self) -> Dict:
+        """Request Gemini to generate a new question"""
+        # First question is always major selection
+        if self.question_count == 0:
+            return self.generate_major_selection_question()
+        
+        try:
+            question_data = self.request_question(self.build_prompt())
         except Exception as e:
             print(f"Error generating question: {e}")
             raise
+        
+        self.record_question(question_data)
+        return question_data
+    
+    def generate_fallback_question(self, corpus=None) -> Dict:
+        """Generate the next question locally, from the shared corpus if it has one that fits, else from templates"""
+        asked = set(self.questions.texts)
+        if corpus is not None:
+            with profiling.phase("corpus_question"):
+                question_data = corpus.pick(self.major, self.get_year_label(), self.stats, asked)
+            if question_data is not None:
+                self.record_question(question_data)
+                return question_data
+        
+        with profiling.phase("template_question"):
+            question_data = generate_template_question(
+                major=self.major,
+                year=self.get_year_label(),
+                stats=self.stats,
+                recent_events=[e for e in self.events[-3:] if e.question_num >= self.question_count - 1],
+                asked=asked,
+            )
+        self.record_question(question_data)
+        return question_data
     
     def apply_choice(self, question_data: Dict, choice_id: str):
         """Apply the effects of a chosen answer"""
@@ -420,9 +411,9 @@ Current Game State:
         # Record the decision
         decision = Decision(
             question_num=self.question_count,
-            question=question_data['question'],
+            question_id=self.questions.add(question_data['question']),
             choice=choice['text'],
-            effects=choice['effects']
+            effects=pack_effects(choice['effects'])
         )
         self.decisions.append(decision)
         
@@ -491,6 +482,21 @@ Current Game State:
         
         return False
     
+    @staticmethod
+    def dropout_chance(avg: float) -> float:
+        """Chance of dropping out at a dropout check - lower average = higher dropout chance"""
+        # Below 15: 90% chance, 15-20: 75% chance, 20-25: 60% chance, 25-30: 45% chance, 30-35: 30% chance
+        if avg < 15:
+            return 0.90
+        elif avg < 20:
+            return 0.75
+        elif avg < 25:
+            return 0.60
+        elif avg < 30:
+            return 0.45
+        else:
+            return 0.30
+    
     def check_dropout_resolution(self) -> Optional[str]:
         """
         Check if dropout warning should be resolved or trigger dropout.
@@ -513,18 +519,7 @@ Current Game State:
             return 'improved'
         
         # Player didn't improve - calculate dropout chance
-        # Lower average = higher dropout chance
-        # Below 15: 90% chance, 15-20: 75% chance, 20-25: 60% chance, 25-30: 45% chance, 30-35: 30% chance
-        if current_avg < 15:
-            dropout_chance = 0.90
-        elif current_avg < 20:
-            dropout_chance = 0.75
-        elif current_avg < 25:
-            dropout_chance = 0.60
-        elif current_avg < 30:
-            dropout_chance = 0.45
-        else:
-            dropout_chance = 0.30
+        dropout_chance = self.dropout_chance(current_avg)
         
         # Roll for dropout
         roll = random.random()
@@ -587,7 +582,22 @@ Current Game State:
     
     def check_graduation(self) -> bool:
         """Check if player has completed enough questions to graduate"""
-        return self.question_count >= 20  # 4 years * ~10 questions per year
+        return self.question_count >= self.GRADUATION_QUESTIONS
+    
+    @staticmethod
+    def honors_tier(avg: float) -> Optional[str]:
+        """Latin honors earned at graduation for a given average, or None"""
+        if avg >= 80:
+            return "Summa Cum Laude"
+        if avg >= 70:
+            return "Magna Cum Laude"
+        if avg >= 60:
+            return "Cum Laude"
+        return None
+    
+    def get_honors_tier(self) -> Optional[str]:
+        """Latin honors earned at graduation based on average stats, or None"""
+        return self.honors_tier(self.stats.get_average())
     
     def display_ending(self):
         """Display graduation message based on final stats"""
@@ -645,7 +655,7 @@ Current Game State:
 
 def main():
     """Main game loop for terminal testing"""
-    api_key = os.environ.get('GEMINI_KEY')
+    api_key = get_api_key()
     
     if not api_key:
         print("Error: GEMINI_KEY environment variable not set")
@@ -0,0 +1,204 @@
+# outcome_export.py
+#
+# Buffered Parquet export of finished games and their per-turn decisions.
+# Rows are queued from the request path and written by a background thread,
+# batched into row groups and rotated into new files by size and age.
+#
+# Requires pyarrow (optional): without it the exporter disables itself.
+
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from game_state import unpack_effects
+
+
+class OutcomeExporter:
+    """Writes completed games to <export_dir>/games/ and decisions to <export_dir>/decisions/"""
+
+    def __init__(
+        self,
+        export_dir: str,
+        batch_rows: int = 1000,
+        flush_interval: float = 10.0,
+        max_file_bytes: int = 64 * 1024 * 1024,
+        max_file_age: float = 3600.0,
+    ):
+        self.export_dir = export_dir
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_file_age = max_file_age
+        self.enabled = False
+        self.dropped = 0
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=batch_rows * 100)
+        self._thread: Optional[threading.Thread] = None
+        self._buffers: Dict[str, List[Dict]] = {"games": [], "decisions": []}
+        self._writers: Dict[str, Dict] = {}
+        self._schemas = {}
+        self._pa = None
+        self._pq = None
+
+    def start(self):
+        """Load pyarrow and start the writer thread"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("Outcome export disabled: pyarrow is not installed")
+            return
+
+        self._pa, self._pq = pa, pq
+        self._schemas = {
+            "games": pa.schema([
+                ("game_id", pa.string()),
+                ("major", pa.string()),
+                ("outcome", pa.string()),  # 'graduated' or 'dropout'
+                ("morale", pa.int8()),
+                ("academics", pa.int8()),
+                ("health", pa.int8()),
+                ("average", pa.float32()),
+                ("question_count", pa.int16()),
+                ("dropout_turn", pa.int16()),
+                ("honors_tier", pa.string()),
+                ("event_types", pa.list_(pa.string())),
+                ("ended_at", pa.timestamp("ms", tz="UTC")),
+            ]),
+            "decisions": pa.schema([
+                ("game_id", pa.string()),
+                ("question_num", pa.int16()),
+                ("question", pa.string()),
+                ("choice", pa.string()),
+                ("morale", pa.int8()),
+                ("academics", pa.int8()),
+                ("health", pa.int8()),
+            ]),
+        }
+        for kind in self._schemas:
+            os.makedirs(os.path.join(self.export_dir, kind), exist_ok=True)
+
+        self.enabled = True
+        self._thread = threading.Thread(target=self._run, name="outcome-export", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Flush everything buffered and close open files"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._queue.put(None)
+        self._thread.join()
+
+    def record_game(self, game_id: str, simulator, outcome: str):
+        """Queue a finished game and its decisions; never blocks the caller"""
+        if not self.enabled:
+            return
+
+        stats = simulator.stats
+        rows = [("games", {
+            "game_id": game_id,
+            "major": simulator.major,
+            "outcome": outcome,
+            "morale": stats.morale,
+            "academics": stats.academics,
+            "health": stats.health,
+            "average": stats.get_average(),
+            "question_count": simulator.question_count,
+            "dropout_turn": simulator.question_count if outcome == "dropout" else None,
+            "honors_tier": simulator.get_honors_tier() if outcome == "graduated" else None,
+            "event_types": [e.type for e in simulator.events],
+            "ended_at": datetime.now(timezone.utc),
+        })]
+        for decision in simulator.decisions:
+            effects = unpack_effects(decision.effects)
+            rows.append(("decisions", {
+                "game_id": game_id,
+                "question_num": decision.question_num,
+                "question": decision.question(simulator.questions),
+                "choice": decision.choice,
+                **effects,
+            }))
+
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                self._flush_all()
+                for kind in list(self._writers):
+                    self._close(kind)
+                return
+
+            for kind, row in item:
+                self._buffers[kind].append(row)
+                if len(self._buffers[kind]) >= self.batch_rows:
+                    self._flush(kind)
+
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self._flush_all()
+                last_flush = time.monotonic()
+
+    def _flush_all(self):
+        for kind in self._buffers:
+            self._flush(kind)
+        # Close files that have aged out even if nothing new arrived
+        for kind in list(self._writers):
+            if time.monotonic() - self._writers[kind]["opened"] >= self.max_file_age:
+                self._close(kind)
+
+    def _flush(self, kind: str):
+        rows = self._buffers[kind]
+        if not rows:
+            return
+        self._buffers[kind] = []
+
+        try:
+            table = self._pa.Table.from_pylist(rows, schema=self._schemas[kind])
+            writer = self._writer(kind)
+            writer["writer"].write_table(table)
+            # Uncompressed Arrow size: an upper bound on what was added to the file
+            writer["bytes"] += table.nbytes
+            if writer["bytes"] >= self.max_file_bytes:
+                self._close(kind)
+        except Exception as e:
+            print(f"Outcome export failed for {len(rows)} {kind} rows: {e}")
+
+    def _writer(self, kind: str) -> Dict:
+        """Return the open writer for kind, rotating it if it is too old"""
+        writer = self._writers.get(kind)
+        if writer and time.monotonic() - writer["opened"] >= self.max_file_age:
+            self._close(kind)
+            writer = None
+
+        if writer is None:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            final_path = os.path.join(self.export_dir, kind, f"{kind}-{stamp}-{uuid.uuid4().hex[:8]}.parquet")
+            writer = {
+                "path": final_path + ".tmp",
+                "final_path": final_path,
+                "writer": self._pq.ParquetWriter(final_path + ".tmp", self._schemas[kind], compression="zstd"),
+                "opened": time.monotonic(),
+                "bytes": 0,
+            }
+            self._writers[kind] = writer
+        return writer
+
+    def _close(self, kind: str):
+        """Finish the current file and publish it under its final name"""
+        writer = self._writers.pop(kind)
+        writer["writer"].close()
+        os.replace(writer["path"], writer["final_path"])
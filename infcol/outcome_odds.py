@@ -0,0 +1,368 @@
+# outcome_odds.py
+#
+# Exact graduation / dropout / honors probabilities by dynamic programming
+# over (morale, academics, health, dropout warning, turn), for balancing the
+# dropout rules in CollegeSimulator.
+#
+# Each turn's chosen-answer effects are drawn from an EffectDistribution,
+# either empirical (recorded decisions) or parametric. Stats live on a grid of
+# multiples of `step` (5 by default: every effect in the prompt examples and
+# template bank is a multiple of 5); effects are rounded onto that grid.
+#
+#   python outcome_odds.py [--decisions decisions.parquet ...] [--out table.pkl] [--simulate N]
+
+import argparse
+import contextlib
+import io
+import pickle
+import random
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from game_state import STAT_NAMES, Stats
+from infcollege import CollegeSimulator
+
+# Graduation tiers, best first (None = graduated without honors)
+TIERS = ("Summa Cum Laude", "Magna Cum Laude", "Cum Laude", None)
+
+Effect = Tuple[int, int, int]
+
+
+class EffectDistribution:
+    """Distribution of the effects applied on one turn (null counts as 0).
+
+    Holds either a joint distribution over (morale, academics, health) deltas,
+    or independent per-stat marginals, which the solver convolves one axis at
+    a time.
+    """
+
+    def __init__(self, joint: Optional[Dict[Effect, float]] = None, marginals: Optional[Tuple[Dict[int, float], ...]] = None):
+        if (joint is None) == (marginals is None):
+            raise ValueError("Provide exactly one of joint or marginals")
+        self.joint = joint
+        self.marginals = marginals
+
+    @classmethod
+    def empirical(cls, effects: Iterable[Dict[str, Optional[int]]]) -> "EffectDistribution":
+        """Joint distribution from recorded effects dicts, e.g. decision rows"""
+        counts = Counter(tuple(effect.get(stat) or 0 for stat in STAT_NAMES) for effect in effects)
+        total = sum(counts.values())
+        if not total:
+            raise ValueError("No effects to build a distribution from")
+        return cls(joint={effect: n / total for effect, n in counts.items()})
+
+    @classmethod
+    def from_parquet(cls, paths: Iterable[str]) -> "EffectDistribution":
+        """Empirical distribution from decision files written by OutcomeExporter"""
+        import pyarrow.parquet as pq
+
+        rows = []
+        for path in paths:
+            rows.extend(pq.read_table(path, columns=list(STAT_NAMES)).to_pylist())
+        return cls.empirical(rows)
+
+    @classmethod
+    def parametric(cls, null_prob: float = 0.4, low: int = -40, high: int = 40, step: int = 5) -> "EffectDistribution":
+        """Independent stats: null with null_prob, otherwise uniform over low..high in step increments"""
+        values = list(range(low, high + 1, step))
+        marginal = Counter({value: (1 - null_prob) / len(values) for value in values})
+        marginal[0] += null_prob
+        return cls(marginals=(dict(marginal),) * len(STAT_NAMES))
+
+
+class OddsTable:
+    """Chance to graduate from every live state, looked up in O(1).
+
+    graduate[(turn, warning)] is a flat array over the stat grid holding the
+    probability of graduating given the game is still running after question
+    `turn` was answered. new_game holds the exact outcome distribution,
+    honors tiers included, for a game that hasn't started.
+    """
+
+    def __init__(self, step: int, graduate: Dict[Tuple[int, bool], array], new_game: Dict[str, float]):
+        self.step = step
+        self.n = 100 // step + 1
+        self.graduate = graduate
+        self.new_game = new_game
+
+        # Before the major is chosen (turn 0), each grid point maps through the fixed
+        # major selection effect onto the turn 1 table, so lookups stay a plain index
+        if (0, False) not in graduate:
+            n, after = self.n, graduate[(1, False)]
+            graduate[(0, False)] = graduate[(0, True)] = array("d", (
+                after[self.index(*first_turn_stats(Stats(min(100, m * step), min(100, a * step), min(100, h * step))))]
+                for m in range(n) for a in range(n) for h in range(n)
+            ))
+
+    def index(self, morale: int, academics: int, health: int) -> int:
+        """Flat grid index for a set of stats, rounded to the nearest grid point"""
+        n, step = self.n, self.step
+        m, a, h = (min(n - 1, max(0, round(v / step))) for v in (morale, academics, health))
+        return (m * n + a) * n + h
+
+    def lookup(self, turn: int, morale: int, academics: int, health: int, warning_active: bool = False) -> float:
+        """Chance to graduate after question `turn` was answered and the game continued"""
+        if turn < 1:
+            turn = 0  # Before the major is chosen
+        return self.graduate[(turn, warning_active)][self.index(morale, academics, health)]
+
+    def chance_to_graduate(self, simulator: CollegeSimulator) -> float:
+        """Chance to graduate for a game, 0 or 1 once it has ended"""
+        if simulator.outcome is not None:
+            return 1.0 if simulator.outcome == 'graduated' else 0.0
+
+        # question_count already includes a question that is waiting for an answer
+        answered = len(simulator.decisions)
+        if answered >= CollegeSimulator.GRADUATION_QUESTIONS:
+            return 1.0
+        stats = simulator.stats
+        return self.lookup(answered, stats.morale, stats.academics, stats.health, simulator.dropout_warning_active)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump({"step": self.step, "graduate": self.graduate, "new_game": self.new_game}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "OddsTable":
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        return cls(data["step"], data["graduate"], data["new_game"])
+
+
+def first_turn_stats(stats: Stats) -> Effect:
+    """Stats after the major selection question, whose effect is the same for both answers"""
+    stats = Stats(stats.morale, stats.academics, stats.health)
+    stats.apply_effects(CollegeSimulator.MAJOR_SELECTION_EFFECTS)
+    return stats.morale, stats.academics, stats.health
+
+
+@lru_cache(maxsize=None)
+def axis_shift(n: int, delta: int) -> Tuple[int, ...]:
+    """Clamped destination index along one stat axis for a shift of delta grid points"""
+    return tuple(min(n - 1, max(0, i + delta)) for i in range(n))
+
+
+@lru_cache(maxsize=None)
+def joint_shift(n: int, effect: Effect) -> array:
+    """Flat destination index of every grid state under a joint effect (memoized per effect)"""
+    dm, da, dh = (axis_shift(n, d) for d in effect)
+    return array("i", ((dm[m] * n + da[a]) * n + dh[h] for m in range(n) for a in range(n) for h in range(n)))
+
+
+@lru_cache(maxsize=None)
+def axis_state_shift(n: int, axis: int, delta: int) -> array:
+    """Flat destination index of every grid state when only one axis shifts"""
+    shift = axis_shift(n, delta)
+    index = []
+    for m in range(n):
+        for a in range(n):
+            for h in range(n):
+                coords = [m, a, h]
+                coords[axis] = shift[coords[axis]]
+                index.append((coords[0] * n + coords[1]) * n + coords[2])
+    return array("i", index)
+
+
+def expect(values: array, terms: List[Tuple[float, array]]) -> array:
+    """E[values[next state]] for every state, given (probability, destination index) terms"""
+    values = list(values)  # Indexing a list avoids boxing a new float per read
+    result = [0.0] * len(values)
+    for p, destination in terms:
+        result = [r + p * values[j] for r, j in zip(result, destination)]
+    return array("d", result)
+
+
+def push(mass: List[float], terms: List[Tuple[float, array]]) -> List[float]:
+    """Move probability mass to next states, visiting only states that hold any"""
+    result = [0.0] * len(mass)
+    occupied = [(i, m) for i, m in enumerate(mass) if m]
+    for p, destination in terms:
+        for i, m in occupied:
+            result[destination[i]] += p * m
+    return result
+
+
+class Solver:
+    """Shared grid and transitions for one effect distribution"""
+
+    def __init__(self, distribution: EffectDistribution, step: int = 5):
+        if 5 % step:
+            raise ValueError("step must divide 5 so the starting stats lie on the grid")
+
+        self.step = step
+        self.n = n = 100 // step + 1
+
+        # Per-turn transitions in grid units: one pass for a joint distribution, one per axis for marginals
+        if distribution.joint is not None:
+            joint: Dict[Effect, float] = Counter()
+            for effect, p in distribution.joint.items():
+                joint[tuple(round(d / step) for d in effect)] += p
+            self.passes = [[(p, joint_shift(n, effect)) for effect, p in joint.items()]]
+        else:
+            self.passes = []
+            for axis, marginal in enumerate(distribution.marginals):
+                grid: Dict[int, float] = Counter()
+                for d, p in marginal.items():
+                    grid[round(d / step)] += p
+                self.passes.append([(p, axis_state_shift(n, axis, d)) for d, p in grid.items()])
+
+        sim = CollegeSimulator
+        self.averages = [(m + a + h) * step / 3 for m in range(n) for a in range(n) for h in range(n)]
+        self.survive = [1 - sim.dropout_chance(avg) for avg in self.averages]
+        # Whether a state resolves without a dropout roll, per warning state
+        self.safe = {
+            warning: [
+                avg > sim.DROPOUT_CHECK_THRESHOLD or (not warning and avg >= sim.DROPOUT_WARNING_THRESHOLD)
+                for avg in self.averages
+            ]
+            for warning in (False, True)
+        }
+
+    def graduation_table(self) -> Dict[Tuple[int, bool], array]:
+        """Backward induction of the chance to graduate from the last question to the first"""
+        sim = CollegeSimulator
+        last = sim.GRADUATION_QUESTIONS
+        size = self.n ** 3
+        graduate: Dict[Tuple[int, bool], array] = {}
+
+        for turn in range(last - 1, 0, -1):
+            for warning in (False, True):
+                if warning and turn < sim.FIRST_YEAR_QUESTIONS:
+                    # No warning can be active yet
+                    graduate[(turn, True)] = graduate[(turn, False)]
+                    continue
+
+                # Chance to graduate from landing on each state when question turn + 1 resolves
+                if turn + 1 >= last:
+                    # The server checks graduation last, so it overrides a dropout on the final question
+                    landing = array("d", [1.0]) * size
+                elif turn + 1 < sim.FIRST_YEAR_QUESTIONS:
+                    landing = graduate[(turn + 1, False)]
+                else:
+                    keep, warned = graduate[(turn + 1, False)], graduate[(turn + 1, True)]
+                    landing = array("d", (
+                        keep[i] if safe else self.survive[i] * warned[i]
+                        for i, safe in enumerate(self.safe[warning])
+                    ))
+
+                for terms in self.passes:
+                    landing = expect(landing, terms)
+                graduate[(turn, warning)] = landing
+
+        return graduate
+
+    def outcomes(self, start: Effect) -> Dict[str, float]:
+        """Forward propagation from a starting state after question 1: exact outcome distribution"""
+        sim = CollegeSimulator
+        size = self.n ** 3
+        outcomes: Counter = Counter()
+
+        mass = {False: [0.0] * size, True: [0.0] * size}
+        m, a, h = (round(v / self.step) for v in start)
+        mass[False][(m * self.n + a) * self.n + h] = 1.0
+
+        for turn in range(2, sim.GRADUATION_QUESTIONS + 1):
+            for warning in (False, True):
+                for terms in self.passes:
+                    mass[warning] = push(mass[warning], terms)
+
+            if turn >= sim.GRADUATION_QUESTIONS:
+                for warning in (False, True):
+                    for i, p in enumerate(mass[warning]):
+                        if p:
+                            outcomes[sim.honors_tier(self.averages[i]) or "No Honors"] += p
+                break
+
+            if turn < sim.FIRST_YEAR_QUESTIONS:
+                continue
+
+            resolved = {False: [0.0] * size, True: [0.0] * size}
+            for warning in (False, True):
+                for i, p in enumerate(mass[warning]):
+                    if not p:
+                        continue
+                    if self.safe[warning][i]:
+                        resolved[False][i] += p
+                    else:
+                        outcomes["dropout"] += p * (1 - self.survive[i])
+                        resolved[True][i] += p * self.survive[i]
+            mass = resolved
+
+        return dict(outcomes)
+
+
+def solve(distribution: EffectDistribution, step: int = 5) -> OddsTable:
+    """Build the chance-to-graduate lookup and the exact new-game outcome distribution"""
+    solver = Solver(distribution, step)
+    start = first_turn_stats(Stats())
+    return OddsTable(step, solver.graduation_table(), solver.outcomes(start))
+
+
+def simulate(distribution: EffectDistribution, games: int, rng: random.Random = random) -> Dict[str, float]:
+    """Monte Carlo estimate using CollegeSimulator's own rules, to cross-check solve()"""
+    if distribution.joint is not None:
+        effects, weights = zip(*distribution.joint.items())
+        draw = lambda: rng.choices(effects, weights)[0]
+    else:
+        axes = [list(zip(*m.items())) for m in distribution.marginals]
+        draw = lambda: tuple(rng.choices(values, weights)[0] for values, weights in axes)
+
+    outcomes: Counter = Counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(games):
+            simulator = CollegeSimulator()
+            simulator.apply_choice(simulator.generate_major_selection_question(), "A1")
+            while True:
+                simulator.question_count += 1
+                simulator.stats.apply_effects(dict(zip(STAT_NAMES, draw())))
+                dropout = False
+                if simulator.is_past_first_year():
+                    simulator.check_dropout_warning()
+                    dropout = simulator.check_dropout_resolution() == "dropout"
+                if simulator.check_graduation():
+                    outcomes[simulator.get_honors_tier() or "No Honors"] += 1
+                    break
+                if dropout:
+                    outcomes["dropout"] += 1
+                    break
+
+    return {outcome: n / games for outcome, n in outcomes.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact College Simulator outcome probabilities")
+    parser.add_argument("--decisions", nargs="*", help="Decision Parquet files for an empirical effect distribution")
+    parser.add_argument("--null-prob", type=float, default=0.4, help="Parametric: chance a stat is unaffected")
+    parser.add_argument("--low", type=int, default=-40, help="Parametric: lowest effect")
+    parser.add_argument("--high", type=int, default=40, help="Parametric: highest effect")
+    parser.add_argument("--step", type=int, default=5, help="Stat grid step (1 or 5)")
+    parser.add_argument("--out", help="Save the lookup table here")
+    parser.add_argument("--simulate", type=int, default=0, help="Cross-check with N simulated games")
+    args = parser.parse_args()
+
+    if args.decisions:
+        distribution = EffectDistribution.from_parquet(args.decisions)
+    else:
+        distribution = EffectDistribution.parametric(args.null_prob, args.low, args.high)
+
+    table = solve(distribution, args.step)
+    odds = table.new_game
+    print(f"Graduate: {table.lookup(0, 50, 50, 50):.4f}")
+    print(f"Dropout:  {odds.get('dropout', 0.0):.4f}")
+    for tier in TIERS:
+        print(f"  {tier or 'No Honors':<16} {odds.get(tier or 'No Honors', 0.0):.4f}")
+
+    if args.simulate:
+        print(f"\nSimulated ({args.simulate} games):")
+        for outcome, p in sorted(simulate(distribution, args.simulate).items()):
+            print(f"  {outcome:<16} {p:.4f}")
+
+    if args.out:
+        table.save(args.out)
+        print(f"\nSaved lookup table to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
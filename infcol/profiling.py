@@ -0,0 +1,228 @@
+# profiling.py
+#
+# Opt-in per-request profiling. A profiled request gets a sampling thread that
+# records the stacks of the event loop thread and of any thread working on the
+# request's phases (prompt building, SDK call, JSON cleanup, ...). Samples are
+# written in folded-stack format ("frame;frame;frame count"), which
+# flamegraph.pl, speedscope and inferno read directly, with a JSON sidecar of
+# phase timings. Files go into a bounded ring directory.
+#
+# When a request isn't profiled, phase() is one context variable lookup, and
+# ProfileMiddleware is only installed when profiles are being collected.
+
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+_current: contextvars.ContextVar = contextvars.ContextVar("request_profile", default=None)
+_disabled = contextlib.nullcontext()
+
+
+class RequestProfile:
+    """Samples and phase timings collected for one request"""
+
+    def __init__(self, name: str, interval: float, loop_thread: int):
+        self.name = name
+        self.interval = interval
+        self.loop_thread = loop_thread
+        self.samples: Counter = Counter()
+        self.phases: List[Dict] = []
+        self.active_phase: Dict[int, str] = {loop_thread: "event_loop"}
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        self._stop.set()
+        self._sampler.join()
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, phase in list(self.active_phase.items()):
+                frame = frames.get(thread_id)
+                if frame is not None and thread_id != own:
+                    self.samples[fold(frame, phase)] += 1
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        thread_id = threading.get_ident()
+        previous = self.active_phase.get(thread_id)
+        self.active_phase[thread_id] = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                "phase": name,
+                "start_ms": round((start - self.started) * 1000, 3),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            })
+            if previous is None:
+                del self.active_phase[thread_id]
+            else:
+                self.active_phase[thread_id] = previous
+
+
+def fold(frame, root: str, max_depth: int = 128) -> str:
+    """Collapse a stack into 'root;outer;...;inner' form"""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    names.append(root)
+    return ";".join(reversed(names))
+
+
+def phase(name: str):
+    """Time a phase of the current request; a no-op unless the request is profiled"""
+    profile = _current.get()
+    if profile is None:
+        return _disabled
+    return profile.phase(name)
+
+
+def begin(name: str, interval: float) -> contextvars.Token:
+    """Start profiling the current request (call from the event loop thread)"""
+    profile = RequestProfile(name, interval, threading.get_ident())
+    profile.start()
+    return _current.set(profile)
+
+
+def end(token: contextvars.Token, extra: Optional[Dict] = None) -> RequestProfile:
+    """Stop profiling the current request and return what was collected"""
+    profile = _current.get()
+    _current.reset(token)
+    profile.stop()
+    if extra:
+        profile.phases.insert(0, extra)
+    return profile
+
+
+MAX_NAME_LENGTH = 80
+
+
+def request_name(method: str, path: str) -> str:
+    """File-name-safe profile name for a request, hashed past MAX_NAME_LENGTH"""
+    name = re.sub(r"[^A-Za-z0-9.-]", "_", f"{method}{path}")
+    if len(name) > MAX_NAME_LENGTH:
+        digest = hashlib.sha1(name.encode()).hexdigest()[:12]
+        name = f"{name[:MAX_NAME_LENGTH - len(digest) - 1]}-{digest}"
+    return name
+
+
+class ProfileRing:
+    """Bounded on-disk store: keeps only the newest max_profiles profiles"""
+
+    def __init__(self, directory: str, max_profiles: int = 100):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def next_stem(self, name: str) -> str:
+        """Reserve a file name for a profile that is about to be collected"""
+        with self._lock:
+            self._seq += 1
+            return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._seq:06d}-{name}"
+
+    def write(self, profile: RequestProfile, stem: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, stem)
+        with open(base + ".folded", "w") as f:
+            for stack, count in profile.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(base + ".json", "w") as f:
+            json.dump({
+                "request": profile.name,
+                "duration_ms": round(profile.duration * 1000, 3),
+                "sample_interval_ms": profile.interval * 1000,
+                "samples": sum(profile.samples.values()),
+                "phases": profile.phases,
+            }, f, indent=2)
+
+        self._trim()
+        return base + ".folded"
+
+    def _trim(self):
+        folded = sorted(name for name in os.listdir(self.directory) if name.endswith(".folded"))
+        for name in folded[:-self.max_profiles]:
+            stem = os.path.join(self.directory, name[:-len(".folded")])
+            for path in (stem + ".folded", stem + ".json"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+
+def sampled(rate: float) -> bool:
+    """Whether a random sample at this rate includes the current request"""
+    return bool(rate) and random.random() < rate
+
+
+async def loop_lag() -> Dict:
+    """How long the event loop takes to get back to us: a direct measure of contention"""
+    start = time.perf_counter()
+    await asyncio.sleep(0)
+    return {"phase": "event_loop_lag", "duration_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+
+@contextlib.asynccontextmanager
+async def profiled(ring: ProfileRing, name: str, interval: float):
+    """Profile the enclosed block (one request, or one turn of a game channel) into ring; yields the file stem"""
+    lag = await loop_lag()
+    stem = ring.next_stem(name)
+    token = begin(name, interval)
+    try:
+        yield stem
+    finally:
+        profile = end(token, lag)
+        try:
+            await asyncio.to_thread(ring.write, profile, stem)
+        except OSError as e:
+            print(f"Failed to write profile {stem}: {e}")
+
+
+class ProfileMiddleware:
+    """ASGI middleware that profiles opted-in HTTP requests ("X-Profile: 1" or a random sample) into a ProfileRing"""
+
+    def __init__(self, app, ring: ProfileRing, interval: float, sample_rate: float = 0.0):
+        self.app = app
+        self.ring = ring
+        self.interval = interval
+        self.sample_rate = sample_rate
+
+    def wanted(self, scope) -> bool:
+        if scope["type"] != "http":
+            return False  # WebSocket channels profile their turns themselves
+        return (b"x-profile", b"1") in scope["headers"] or sampled(self.sample_rate)
+
+    async def __call__(self, scope, receive, send):
+        if not self.wanted(scope):
+            return await self.app(scope, receive, send)
+
+        # The profile covers the whole response, including streamed bodies
+        async with profiled(self.ring, request_name(scope["method"], scope["path"]), self.interval) as stem:
+            async def send_with_header(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-file", f"{stem}.folded".encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_header)
@@ -0,0 +1,194 @@
+# prompt_builder.py
+#
+# Incremental prompt assembly for the question LLM. Static text (system prompt,
+# section headers, stat warnings) is compiled into segments with their token
+# estimates once per process. Each session only keeps offsets into its own
+# events, decisions and long-term summary plus the token counts of the pieces
+# already seen, so a turn estimates just what was added since the previous one
+# and the text itself is rendered from the simulator's fields. The estimated
+# size is known before the prompt is sent, so a per-turn token budget can be
+# enforced by trimming the oldest context first.
+
+import functools
+import re
+from array import array
+from typing import List, NamedTuple
+
+# Words cost about one token per 4 letters; digit groups and ASCII symbols one
+# each; non-ASCII characters (emoji, accents) two; whitespace nothing. This
+# errs on the high side.
+_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Local, tokenizer-free estimate of how many tokens text costs"""
+    tokens = 0
+    for match in _PIECES.finditer(text):
+        piece = match.group()
+        if piece[0].isascii():
+            tokens += (len(piece) + 3) // 4 if piece[0].isalpha() else 1
+        else:
+            tokens += 2
+    return tokens
+
+
+class Segment(NamedTuple):
+    text: str
+    tokens: int
+
+
+def segment(text: str) -> Segment:
+    return Segment(text, estimate_tokens(text))
+
+
+@functools.lru_cache(maxsize=None)
+def static_segment(text: str) -> Segment:
+    """Segment for text shared by every session, estimated once per process"""
+    return segment(text)
+
+
+class PromptBudgetError(ValueError):
+    """The prompt doesn't fit the token budget even with all trimmable context removed"""
+
+
+RECENT_ITEMS = 3  # Events and decisions kept in the prompt
+
+NO_MAJOR = segment("This is the first question. The student is just starting their college journey as a freshman.")
+SUMMARY_HEADER = segment("\nLong-term Journey Summary:\n")
+EVENTS_HEADER = segment("\nMajor Events:\n")
+DECISIONS_HEADER = segment("\nRecent Decisions:\n")
+RESPOND = segment("\n\nRespond ONLY with the JSON object, no additional text.")
+EMPTY = Segment("", 0)
+
+_WARNINGS = (
+    "⚠️ Morale is very low - student is struggling mentally",
+    "⚠️ Academics are very low - student is at risk of failing",
+    "⚠️ Health is very low - student is physically struggling",
+)
+# Every combination of low morale / academics / health, indexed by bitmask
+WARNING_SEGMENTS = [
+    segment("\nCurrent Struggles:\n" + "".join(f"- {w}\n" for bit, w in enumerate(_WARNINGS) if mask & (1 << bit)) if mask else "")
+    for mask in range(1 << len(_WARNINGS))
+]
+
+
+def event_line(event) -> str:
+    return f"- {event.message}\n"
+
+
+def decision_line(decision, questions) -> str:
+    return f"- Q{decision.question_num}: {decision.question(questions)}\n  Choice: {decision.choice}\n"
+
+
+def footer_text(major: str) -> str:
+    return f"\nGenerate the next question that follows naturally from these past decisions, current stats, major events, and the student's major ({major}). Remember to vary your choice structures - not every choice should be a balanced trade-off! Incorporate major-specific content when appropriate."
+
+
+class PromptBuilder:
+    """Per-session prompt assembly with token accounting"""
+    __slots__ = (
+        "head", "budget", "event_tokens", "decision_tokens", "summary_starts", "summary_tokens",
+        "summary_seen", "footer_tokens", "major", "last_tokens", "last_trimmed",
+    )
+
+    def __init__(self, system_prompt: str, budget: int):
+        self.head = static_segment(f"{system_prompt}\n\n")
+        self.budget = budget
+        self.event_tokens = array('I')      # Token count of each event line
+        self.decision_tokens = array('I')   # Token count of each decision line
+        self.summary_starts = array('I')    # Offset of each piece of the long-term summary
+        self.summary_tokens = array('I')    # Token count of each piece
+        self.summary_seen = 0               # Length of the long-term summary already counted
+        self.footer_tokens = 0
+        self.major = None
+        self.last_tokens = 0   # Estimated size of the last prompt built
+        self.last_trimmed = 0  # Context items dropped from it to fit the budget
+
+    def sync(self, simulator):
+        """Estimate only the events, decisions and summary text added since the last turn"""
+        for event in simulator.events[len(self.event_tokens):]:
+            self.event_tokens.append(estimate_tokens(event_line(event)))
+
+        for decision in simulator.decisions[len(self.decision_tokens):]:
+            self.decision_tokens.append(estimate_tokens(decision_line(decision, simulator.questions)))
+
+        # The long-term summary only ever grows by appending " <summary>"
+        summary = simulator.long_term_summary
+        if len(summary) > self.summary_seen:
+            start = self.summary_seen + 1 if self.summary_seen else 0
+            self.summary_starts.append(start)
+            self.summary_tokens.append(estimate_tokens(summary[start:]))
+            self.summary_seen = len(summary)
+
+        if simulator.major != self.major:
+            self.major = simulator.major
+            self.footer_tokens = estimate_tokens(footer_text(self.major))
+
+    def build(self, simulator) -> str:
+        """Full prompt for the next question, trimmed to the token budget"""
+        if not simulator.major:
+            return self._finish([self.head.text, NO_MAJOR.text, RESPOND.text], self.head.tokens + NO_MAJOR.tokens + RESPOND.tokens, 0)
+
+        self.sync(simulator)
+        stats = simulator.stats
+        state = segment(f"""
+Current Game State:
+- Year: {simulator.get_year_label()}
+- Major: {simulator.major}
+- Current Stats: Morale: {stats.morale}, Academics: {stats.academics}, Health: {stats.health}
+- Average Stats: {stats.get_average():.1f}
+- Questions Answered: {simulator.question_count}
+""")
+        warnings = WARNING_SEGMENTS[(stats.morale < 30) | (stats.academics < 30) << 1 | (stats.health < 30) << 2]
+        dropout = EMPTY
+        if simulator.dropout_warning_active:
+            dropout = segment(f"\n⚠️ CRITICAL: Student is on dropout warning! Average was {simulator.warning_avg:.1f}. They need to improve their overall situation or they may drop out. Generate a scenario that offers opportunities for recovery but also risks of further decline.\n")
+
+        fixed = (self.head.tokens + state.tokens + warnings.tokens + dropout.tokens
+                 + DECISIONS_HEADER.tokens + self.footer_tokens + RESPOND.tokens)
+        pieces = len(self.summary_starts)
+        first_piece = 0
+        n_events = min(RECENT_ITEMS, len(self.event_tokens))
+        n_decisions = min(RECENT_ITEMS, len(self.decision_tokens))
+
+        def total() -> int:
+            tokens = fixed + sum(self.decision_tokens[len(self.decision_tokens) - n_decisions:])
+            if first_piece < pieces:
+                tokens += SUMMARY_HEADER.tokens + sum(self.summary_tokens[first_piece:])
+            if n_events:
+                tokens += EVENTS_HEADER.tokens + sum(self.event_tokens[len(self.event_tokens) - n_events:])
+            return tokens
+
+        # Over budget: drop the oldest summary pieces, then decisions, then events
+        trimmed = 0
+        tokens = total()
+        while tokens > self.budget:
+            if first_piece < pieces:
+                first_piece += 1
+            elif n_decisions:
+                n_decisions -= 1
+            elif n_events:
+                n_events -= 1
+            else:
+                break
+            trimmed += 1
+            tokens = total()
+
+        parts = [self.head.text, state.text]
+        if first_piece < pieces:
+            parts += [SUMMARY_HEADER.text, simulator.long_term_summary[self.summary_starts[first_piece]:], "\n"]
+        parts.append(warnings.text)
+        if n_events:
+            parts.append(EVENTS_HEADER.text)
+            parts += [event_line(e) for e in simulator.events[len(simulator.events) - n_events:]]
+        parts += [dropout.text, DECISIONS_HEADER.text]
+        parts += [decision_line(d, simulator.questions) for d in simulator.decisions[len(simulator.decisions) - n_decisions:]]
+        parts += [footer_text(simulator.major), RESPOND.text]
+        return self._finish(parts, tokens, trimmed)
+
+    def _finish(self, parts: List[str], tokens: int, trimmed: int) -> str:
+        self.last_tokens = tokens
+        self.last_trimmed = trimmed
+        if tokens > self.budget:
+            raise PromptBudgetError(f"Prompt needs {tokens} tokens, budget is {self.budget}")
+        return "".join(parts)
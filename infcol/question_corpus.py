@@ -0,0 +1,217 @@
+# question_corpus.py
+#
+# Read-only, memory-mapped question corpus shared by every worker process.
+# The OS page cache holds one copy of the file no matter how many uvicorn
+# workers map it, and entries are decoded into question dicts only when one
+# is picked.
+#
+# File layout (little endian):
+#   header   8s magic, u32 majors, u32 keys, u32 entries, u32 ids
+#   majors   per major: u16 length + UTF-8 name
+#   keys     per (major, year, stat bucket): u16 major, u8 year, u8 bucket, u32 first id, u32 count
+#   ids      u32 entry ids, grouped by key
+#   entries  per entry: u64 offset into data, u32 length
+#   data     compact JSON question dicts, back to back
+#
+#   python question_corpus.py build corpus.qc questions.jsonl [...]   (rebuild and swap in atomically)
+#   python question_corpus.py info corpus.qc
+
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+MAGIC = b"QCORPUS1"
+HEADER = struct.Struct("<8sIIII")
+KEY = struct.Struct("<HBBII")
+ID = struct.Struct("<I")
+ENTRY = struct.Struct("<QI")
+LENGTH = struct.Struct("<H")
+
+STAT_BUCKETS = 5  # Average stat in bands of 20
+
+
+def stat_bucket(stats) -> int:
+    """Band of the average stat a question was generated for"""
+    return min(STAT_BUCKETS - 1, int(stats.get_average() // 20))
+
+
+def year_number(year: str) -> int:
+    """'Year 3' -> 3"""
+    return int(year.split()[-1])
+
+
+def build_corpus(records: Iterable[Dict], path: str) -> int:
+    """Write a corpus from {"major", "year", "bucket", "question"} records, then atomically replace path"""
+    majors: Dict[str, int] = {}
+    groups: Dict[Tuple[int, int, int], List[int]] = defaultdict(list)
+    blobs: List[bytes] = []
+
+    for record in records:
+        major_id = majors.setdefault(record["major"], len(majors))
+        key = (major_id, year_number(record["year"]), int(record["bucket"]))
+        groups[key].append(len(blobs))
+        blobs.append(json.dumps(record["question"], separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(majors), len(groups), len(blobs), len(blobs)))
+        for name in majors:
+            encoded = name.encode("utf-8")
+            f.write(LENGTH.pack(len(encoded)) + encoded)
+
+        first = 0
+        for (major_id, year, bucket), ids in sorted(groups.items()):
+            f.write(KEY.pack(major_id, year, bucket, first, len(ids)))
+            first += len(ids)
+        for _, ids in sorted(groups.items()):
+            f.write(b"".join(ID.pack(i) for i in ids))
+
+        offset = 0
+        for blob in blobs:
+            f.write(ENTRY.pack(offset, len(blob)))
+            offset += len(blob)
+        for blob in blobs:
+            f.write(blob)
+
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Readers that already mapped the old file keep using it until they reopen
+    os.replace(tmp_path, path)
+    return len(blobs)
+
+
+class QuestionCorpus:
+    """One mapped corpus file. Only the small key index is read into memory."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, n_majors, n_keys, n_entries, n_ids = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a question corpus")
+
+        pos = HEADER.size
+        majors = []
+        for _ in range(n_majors):
+            (length,) = LENGTH.unpack_from(self._mm, pos)
+            pos += LENGTH.size
+            majors.append(self._mm[pos:pos + length].decode("utf-8"))
+            pos += length
+
+        self.keys: Dict[Tuple[str, int, int], Tuple[int, int]] = {}
+        for _ in range(n_keys):
+            major_id, year, bucket, first, count = KEY.unpack_from(self._mm, pos)
+            self.keys[(majors[major_id], year, bucket)] = (first, count)
+            pos += KEY.size
+
+        self._ids_at = pos
+        self._entries_at = self._ids_at + n_ids * ID.size
+        self._data_at = self._entries_at + n_entries * ENTRY.size
+        self.size = n_entries
+
+    def __len__(self) -> int:
+        return self.size
+
+    def ids(self, major: str, year: int, bucket: int) -> List[int]:
+        """Entry ids for one index key"""
+        first, count = self.keys.get((major, year, bucket), (0, 0))
+        return [ID.unpack_from(self._mm, self._ids_at + (first + i) * ID.size)[0] for i in range(count)]
+
+    def get(self, entry_id: int) -> Dict:
+        """Decode one entry into the question dict shape apply_choice expects"""
+        offset, length = ENTRY.unpack_from(self._mm, self._entries_at + entry_id * ENTRY.size)
+        start = self._data_at + offset
+        return json.loads(self._mm[start:start + length])
+
+    def pick(self, major: str, year: str, stats, asked: Set[str] = frozenset(), rng: random.Random = random) -> Optional[Dict]:
+        """A question not yet asked for this major and year, preferring the closest stat bucket"""
+        year_num = year_number(year)
+        bucket = stat_bucket(stats)
+        for candidate in sorted(range(STAT_BUCKETS), key=lambda b: abs(b - bucket)):
+            ids = self.ids(major, year_num, candidate)
+            rng.shuffle(ids)
+            for entry_id in ids:
+                question = self.get(entry_id)
+                if question["question"] not in asked:
+                    return question
+        return None
+
+
+class SharedCorpus:
+    """A corpus path that picks up atomically swapped-in rebuilds without a restart"""
+
+    def __init__(self, path: str, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._corpus: Optional[QuestionCorpus] = None
+        self._identity = None
+        self._checked = 0.0
+
+    def current(self) -> Optional[QuestionCorpus]:
+        """The latest corpus, re-checking the file at most every check_interval seconds"""
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._corpus
+        self._checked = now
+
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return self._corpus
+
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if identity != self._identity:
+            try:
+                # The old mapping is released once nothing references it
+                self._corpus = QuestionCorpus(self.path)
+                self._identity = identity
+            except (OSError, ValueError) as e:
+                print(f"Failed to open question corpus {self.path}: {e}")
+        return self._corpus
+
+    def pick(self, major: str, year: str, stats, asked: Set[str] = frozenset()) -> Optional[Dict]:
+        corpus = self.current()
+        if corpus is None or major is None:
+            return None
+        return corpus.pick(major, year, stats, asked)
+
+
+def append_record(path: str, major: str, year: str, bucket: int, question_data: Dict):
+    """Append a generated question to a JSONL log that build_corpus can consume"""
+    record = {"major": major, "year": year, "bucket": bucket, "question": question_data}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def read_records(paths: Iterable[str]) -> Iterable[Dict]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def main():
+    if len(sys.argv) >= 4 and sys.argv[1] == "build":
+        count = build_corpus(read_records(sys.argv[3:]), sys.argv[2])
+        print(f"Wrote {count} questions to {sys.argv[2]}")
+    elif len(sys.argv) == 3 and sys.argv[1] == "info":
+        corpus = QuestionCorpus(sys.argv[2])
+        print(f"{len(corpus)} questions, {len(corpus.keys)} index keys")
+        for (major, year, bucket), (_, count) in sorted(corpus.keys.items()):
+            print(f"  {major:<45} Year {year}  bucket {bucket}  {count}")
+    else:
+        print("usage: question_corpus.py build OUT.qc LOG.jsonl [...] | info CORPUS.qc")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
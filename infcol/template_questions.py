@@ -0,0 +1,225 @@
+# template_questions.py
+#
+# CPU-only question generator used when the LLM is slow or unavailable.
+# Questions come from template banks keyed by year, stat warnings and recent
+# events, filled in with major-specific details, and are returned in the same
+# shape as CollegeSimulator.generate_question output.
+
+import random
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# (question, (answer 1 text, effects), (answer 2 text, effects))
+# Effects are (morale, academics, health); None means no effect.
+Template = Tuple[str, Tuple[str, Tuple], Tuple[str, Tuple]]
+
+# Flavor words per family of majors, used to fill {course}, {project} and {opportunity}
+MAJOR_FLAVOR = {
+    "engineering": {
+        "keywords": ["Engineering", "Architecture", "Nanoscience", "Technology"],
+        "course": ["Thermodynamics", "Statics", "Circuits", "Materials Science", "Differential Equations"],
+        "project": ["senior design prototype", "lab report", "CAD assignment", "team build"],
+        "opportunity": ["an engineering co-op", "the robotics team", "a research lab position"],
+    },
+    "science": {
+        "keywords": ["Chemistry", "Physics", "Mathematics", "Computer Science", "Cybersecurity", "Psychology", "Dairy Science", "Horticulture", "Conservation"],
+        "course": ["Organic Chemistry", "Linear Algebra", "Data Structures", "Statistics", "Research Methods"],
+        "project": ["lab write-up", "problem set", "research poster", "coding project"],
+        "opportunity": ["an undergraduate research grant", "a summer REU", "a TA position"],
+    },
+    "business": {
+        "keywords": ["Business", "Economics", "Finance", "Management", "Logistics", "Siege Economics"],
+        "course": ["Microeconomics", "Accounting", "Corporate Finance", "Operations Management"],
+        "project": ["case study", "market analysis", "group pitch deck"],
+        "opportunity": ["a summer internship", "the investment club", "a case competition"],
+    },
+    "humanities": {
+        "keywords": ["English", "History", "Philosophy", "Sociology", "Criminology", "Geography", "Music", "Throat Singing"],
+        "course": ["Literary Theory", "Ethics", "Historiography", "Music Theory", "Social Research"],
+        "project": ["term paper", "thesis chapter", "recital piece", "archive research"],
+        "opportunity": ["a writing fellowship", "a study abroad program", "a conference presentation"],
+    },
+    "general": {
+        "keywords": [],
+        "course": ["the intro seminar", "your core requirement", "the department gateway course"],
+        "project": ["final project", "portfolio", "field study"],
+        "opportunity": ["a departmental club", "an internship", "a faculty-led project"],
+    },
+}
+
+YEAR_TEMPLATES: Dict[str, List[Template]] = {
+    "Year 1": [
+        ("Your {major} advisor suggests taking {course} this semester, but everyone says it's a weed-out class.",
+         ("Take it now and get it over with", (-10, 20, -10)),
+         ("Push it back and take an easier elective", (10, -10, None))),
+        ("Your hall is organizing a late-night trip to a diner the night before your first {course} quiz.",
+         ("Go - freshman year is about making friends", (20, -15, -10)),
+         ("Stay in and review your notes", (-10, 15, None))),
+        ("The dining hall has unlimited soft-serve and you haven't found the gym yet.",
+         ("Start a morning workout routine", (5, None, 20)),
+         ("Enjoy the soft-serve, you've earned it", (15, None, -15))),
+    ],
+    "Year 2": [
+        ("You're asked to lead the {project} for {course}, but your group has a reputation for slacking.",
+         ("Take the lead and carry the group", (-15, 25, -15)),
+         ("Let someone else lead and coast", (10, -20, None))),
+        ("Sophomore slump has hit: nothing about {major} feels exciting this semester.",
+         ("Talk to a professor about what drew you to {major}", (20, 10, None)),
+         ("Skip a week of classes to reset", (15, -30, 10))),
+        ("A friend offers you their old notes for {course}, which might count as an academic integrity issue.",
+         ("Decline and study on your own", (-5, 10, None)),
+         ("Use the notes - everyone does it", (10, -25, None))),
+    ],
+    "Year 3": [
+        ("You've been offered {opportunity}, but it overlaps with your hardest {major} semester.",
+         ("Accept - experience matters more than grades", (20, -20, -15)),
+         ("Decline and focus on {course}", (-10, 20, None))),
+        ("Your {project} is due the same week as your roommate's birthday trip.",
+         ("Go on the trip and pull all-nighters after", (25, -15, -30)),
+         ("Stay behind and finish the {project} early", (-20, 25, None))),
+        ("A professor invites you to co-author work related to {major}, with long hours unpaid.",
+         ("Say yes - it's a huge opportunity", (10, 30, -20)),
+         ("Politely decline to protect your schedule", (5, None, 10))),
+    ],
+    "Year 4": [
+        ("Your {major} capstone {project} is falling behind and job applications are piling up.",
+         ("Prioritize the capstone", (-10, 30, -10)),
+         ("Prioritize job applications", (15, -20, None))),
+        ("Senioritis is real: your friends are skipping class to enjoy their last semester.",
+         ("Join them - you only graduate once", (30, -30, None)),
+         ("Finish strong in {course}", (-15, 25, None))),
+        ("A recruiter from {opportunity} offers an interview the morning of your final exam.",
+         ("Reschedule the exam and take the interview", (25, -20, -5)),
+         ("Turn down the interview and take the exam", (-20, 20, None))),
+    ],
+}
+
+# Recovery-or-decline scenarios when a stat is below the warning line (< 30)
+WARNING_TEMPLATES: Dict[str, List[Template]] = {
+    "morale": [
+        ("You've been feeling isolated and unmotivated for weeks. A friend from {course} invites you to dinner.",
+         ("Go, even though you don't feel like it", (25, None, 5)),
+         ("Stay in your room alone again", (-20, -5, -5))),
+        ("The counseling center has same-day appointments this week.",
+         ("Book a session", (30, None, None)),
+         ("Tough it out on your own", (-15, -10, None))),
+    ],
+    "academics": [
+        ("You're failing {course}. The professor holds office hours tomorrow at 8am.",
+         ("Go and ask for a plan to catch up", (-5, 30, None)),
+         ("Sleep in and hope the final curve saves you", (5, -25, 10))),
+        ("The tutoring center offers free help with your {project}.",
+         ("Sign up for weekly sessions", (-5, 25, None)),
+         ("Wing it like last time", (10, -20, None))),
+    ],
+    "health": [
+        ("You've been running on energy drinks and four hours of sleep. Your body is giving out.",
+         ("Take a weekend to sleep and eat properly", (10, -10, 35)),
+         ("Buy another case of energy drinks", (-10, 10, -30))),
+        ("You've had a cough for three weeks and student health has an opening today.",
+         ("Go to the appointment", (None, -5, 30)),
+         ("Ignore it and go to {course}", (-10, 5, -25))),
+    ],
+}
+
+# Follow-ups to the crisis events recorded by CollegeSimulator
+EVENT_TEMPLATES: Dict[str, List[Template]] = {
+    "academic_suspension": [
+        ("Your advisor lays out an academic probation plan for {major}: mandatory study hours and a reduced social calendar.",
+         ("Commit to the plan fully", (-15, 30, None)),
+         ("Nod along and keep doing what you were doing", (10, -25, None))),
+    ],
+    "medical_leave": [
+        ("Student health recommends dropping a class to recover from your health issues.",
+         ("Drop {course} and focus on recovery", (5, -20, 35)),
+         ("Keep the full load and push through", (-20, 10, -25))),
+    ],
+    "mental_health_crisis": [
+        ("The counseling center follows up about your urgent session and suggests a support group.",
+         ("Join the support group", (35, None, 5)),
+         ("Skip it - you don't want anyone to know", (-25, -10, None))),
+    ],
+    "dropout_warning": [
+        ("The dean's office calls you in about your dropout warning and offers a last-chance success plan.",
+         ("Accept the success plan and its strict check-ins", (-10, 25, 10)),
+         ("Decide to take things one day at a time", (5, -15, -10))),
+    ],
+}
+
+SUMMARIES = {
+    "year": "Facing a typical {year} decision in {major}, the student had to choose between short-term relief and long-term progress.",
+    "warning": "With their {stat} dangerously low, the student faced a chance to recover or slide further.",
+    "event": "In the aftermath of a recent {event}, the student decided how to respond.",
+}
+
+
+def major_flavor(major: Optional[str]) -> Dict:
+    """Pick the flavor family whose keywords match the major"""
+    for family, flavor in MAJOR_FLAVOR.items():
+        if major and any(keyword in major for keyword in flavor["keywords"]):
+            return flavor
+    return MAJOR_FLAVOR["general"]
+
+
+def jitter(effects: Tuple, rng: random.Random) -> Dict[str, Optional[int]]:
+    """Turn an effects tuple into the question effects dict, varying non-null values slightly"""
+    return {
+        stat: (None if value is None else value + rng.choice((-5, 0, 0, 5)))
+        for stat, value in zip(("morale", "academics", "health"), effects)
+    }
+
+
+def generate_template_question(
+    major: Optional[str],
+    year: str,
+    stats,
+    recent_events: Iterable,
+    asked: Set[str] = frozenset(),
+    rng: random.Random = random,
+) -> Dict:
+    """Build a two-answer question from the template banks.
+
+    Prefers a follow-up to a recent crisis event, then a recovery scenario for
+    the weakest stat below the warning line, then a year-appropriate scenario.
+    Templates whose text was already asked this game are skipped when possible.
+    """
+    candidates: List[Tuple[Template, str, Dict]] = []
+
+    for event in reversed(list(recent_events)):
+        for template in EVENT_TEMPLATES.get(event.type, []):
+            candidates.append((template, "event", {"event": event.type.replace("_", " ")}))
+
+    low_stats = sorted(
+        (value, stat) for stat, value in
+        (("morale", stats.morale), ("academics", stats.academics), ("health", stats.health))
+        if value < 30
+    )
+    for _, stat in low_stats:
+        for template in WARNING_TEMPLATES[stat]:
+            candidates.append((template, "warning", {"stat": stat}))
+
+    year_templates = YEAR_TEMPLATES.get(year, YEAR_TEMPLATES["Year 1"])
+    for template in rng.sample(year_templates, len(year_templates)):
+        candidates.append((template, "year", {}))
+
+    flavor = major_flavor(major)
+    fill = {
+        "major": major or "your major",
+        "year": year,
+        "course": rng.choice(flavor["course"]),
+        "project": rng.choice(flavor["project"]),
+        "opportunity": rng.choice(flavor["opportunity"]),
+    }
+
+    fresh = [c for c in candidates if c[0][0].format(**fill) not in asked]
+    template, kind, extra = (fresh or candidates)[0]
+    question, (text_1, effects_1), (text_2, effects_2) = template
+
+    return {
+        "question": question.format(**fill),
+        "year": year,
+        "summary": SUMMARIES[kind].format(**fill, **extra),
+        "answers": [
+            {"id": "A1", "text": text_1.format(**fill), "effects": jitter(effects_1, rng)},
+            {"id": "A2", "text": text_2.format(**fill), "effects": jitter(effects_2, rng)},
+        ]
+    }